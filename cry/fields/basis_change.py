@@ -2,6 +2,7 @@ from itertools import product
 
 from cry.sagestuff import GF
 from cry.sbox2 import SBox2
+from cry.sbox2.algorithms.field import gf2n_of
 
 BASIS_LIST = "polynomial normal".split()
 
@@ -25,7 +26,10 @@ class SubfieldDecomposition(object):
 
         self.X = self.fsmall.polynomial_ring().gen()
 
-        self.g1 = self.flarge.gen()
+        self.large = gf2n_of(self.flarge)
+        self.small_mul = gf2n_of(self.fsmall).mul_table().tolist()
+
+        self.g1 = self.flarge.gen().integer_representation()
         self.exp1, self.log1 = self.compute_explog(self.g1, in_field=True)
 
     def set_poly(self, A, B, basis="polynomial"):
@@ -34,6 +38,7 @@ class SubfieldDecomposition(object):
         self.A = self.fsmall.fetch_int(A)
         self.iA = 1/self.A
         self.B = self.fsmall.fetch_int(B)
+        self.intiA = self.iA.integer_representation()
         self.basis = basis
         assert basis in BASIS_LIST
 
@@ -43,7 +48,7 @@ class SubfieldDecomposition(object):
             return
 
     def check_gens(self, only_linear=True):
-        for g2 in xrange(2, 2**self.N):
+        for g2 in range(2, 2**self.N):
             try:
                 exp2, log2 = self.compute_explog(g2, in_field=False, mulfunc=self.mul)
             except ValueError:
@@ -69,7 +74,7 @@ class SubfieldDecomposition(object):
 
     def make_transition(self, exp2, log2):
         large_to_double = [0, 1]
-        for x in xrange(2, 2**self.N):
+        for x in range(2, 2**self.N):
             l = self.log1[x]
             y = exp2[l]
             large_to_double.append(y)
@@ -80,33 +85,39 @@ class SubfieldDecomposition(object):
         exp = []
         log = [None] * 2**self.N
 
-        cur = self.flarge(1) if in_field else 1
+        if in_field:
+            mulfunc = self.large_mul
+        cur = 1
         seen = set()
-        for e in xrange(2**self.N-1):
-            toput = cur.integer_representation() if in_field else cur
-            exp.append(toput)
-            log[toput] = e
-            if toput in seen:
+        for e in range(2**self.N-1):
+            exp.append(cur)
+            log[cur] = e
+            if cur in seen:
                 raise ValueError("Not a generator: %r: powers %r" % (g, exp))
-            seen.add(toput)
-            cur = g * cur if not mulfunc else mulfunc(g, cur)
+            seen.add(cur)
+            cur = mulfunc(g, cur)
         return exp, log
 
+    def large_mul(self, x, y):
+        return int(self.large.mul(x, y))
+
     def mul(self, x, y):
-        toF = self.fsmall.fetch_int
-        a, b = toF(x >> self.D), toF(x & self.mask)
-        c, d = toF(y >> self.D), toF(y & self.mask)
+        mul = self.small_mul
+        A, B = self.intA, self.intB
+        a, b = x >> self.D, x & self.mask
+        c, d = y >> self.D, y & self.mask
 
         if self.basis == "polynomial":
+            ac = mul[a][c]
             a, b = (
-                (a*d + b*c + self.A*a*c).integer_representation(),
-                (b*d + self.B*a*c).integer_representation()
+                mul[a][d] ^ mul[b][c] ^ mul[A][ac],
+                mul[b][d] ^ mul[B][ac]
             )
         elif self.basis == "normal":
-            t = (a + b)*(c + d)*self.iA*self.B
+            t = mul[mul[a ^ b][c ^ d]][mul[self.intiA][B]]
             a, b = (
-                (a*c*self.A + t).integer_representation(),
-                (b*d*self.A + t).integer_representation()
+                mul[mul[a][c]][A] ^ t,
+                mul[mul[b][d]][A] ^ t
             )
         else:
             assert 0
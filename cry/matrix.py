@@ -74,10 +74,11 @@ def mat_field_mul_const(field, c):
     assert field.base_ring() == GF(2)
     d = field.degree()
     m = matrix(GF(2), d, d)
+    from cry.sbox2.algorithms.field import gf2n_of  # cry.sbox2 imports us
+
+    F = gf2n_of(field)
     for i, e in enumerate(reversed(range(d))):
-        x = 1 << e
-        res = field.fetch_int(x) * field.fetch_int(c)
-        res = res.integer_representation()
+        res = int(F.mul(1 << e, c))
         m.set_column(i, Bin(res, d).tuple)
     return m
 
@@ -1,46 +1,180 @@
+"""
+Butterfly transforms of truth tables.
+
+Each transform has an in-place iterative version working on any mutable
+buffer: list, array.array, bytearray (element loops) or a C-contiguous
+numpy array (one vectorized pass per level, no temporaries).
+The plain versions take a list/tuple and return a new tuple.
+
+>>> mobius((0, 0, 0, 1))
+(0, 0, 0, 1)
+>>> mobius((1, 1, 1, 1))
+(1, 0, 0, 0)
+>>> walsh((1, 1, 1, -1))
+(2, 2, 2, -2)
+>>> submask_sum((1, 2, 3, 4))
+(1, 3, 4, 10)
+>>> undo_submask_sum((1, 3, 4, 10))
+(1, -2, -3, 4)
+
+>>> from array import array
+>>> mobius_inplace(bytearray([1, 1, 1, 1]))
+bytearray(b'\\x01\\x00\\x00\\x00')
+>>> walsh_inplace(array("l", [1, 1, 1, -1]))
+array('l', [2, 2, 2, -2])
+
+Boolean functions packed into integers (bit x holds f(x)):
+
+>>> tt = pack([0, 1, 1, 0, 1, 0, 0, 1])
+>>> hex(tt)
+'0x96'
+>>> unpack(mobius_packed(tt, 3), 3)
+[0, 1, 1, 0, 1, 0, 0, 0]
+>>> mobius_packed(mobius_packed(tt, 3), 3) == tt
+True
+"""
+from functools import lru_cache
+
+
 def mobius(bf):
     assert isinstance(bf, list) or isinstance(bf, tuple)
-    if len(bf) == 1:
-        return (bf[0],)
-    assert len(bf) & 1 == 0
-    h = len(bf) // 2
-    sub0 = mobius(bf[:h])
-    sub1 = mobius(bf[h:])
-    return sub0 + tuple(a ^ b for a, b in zip(sub0, sub1))
+    return tuple(mobius_inplace(list(bf)))
 
 
 def walsh(bf):
     assert isinstance(bf, list) or isinstance(bf, tuple)
-    if len(bf) == 1:
-        return (bf[0],)
-    assert len(bf) & 1 == 0
-    h = len(bf) // 2
-    sub0 = walsh(bf[:h])
-    sub1 = walsh(bf[h:])
-    res0 = tuple(a + b for a, b in zip(sub0, sub1))
-    res1 = tuple(a - b for a, b in zip(sub0, sub1))
-    return res0 + res1
+    return tuple(walsh_inplace(list(bf)))
 
 
 def submask_sum(f):
     assert isinstance(f, list) or isinstance(f, tuple)
-    if len(f) == 1:
-        return (f[0],)
-    assert len(f) & 1 == 0
-    h = len(f) // 2
-    sub0 = submask_sum(f[:h])
-    sub1 = submask_sum(f[h:])
-    return sub0 + tuple(a + b for a, b in zip(sub0, sub1))
+    return tuple(submask_sum_inplace(list(f)))
 
 
 def undo_submask_sum(f):
     assert isinstance(f, list) or isinstance(f, tuple)
-    if len(f) == 1:
-        return (f[0],)
-    assert len(f) & 1 == 0
-    h = len(f) // 2
-    f0 = f[:h]
-    f1 = tuple(a - b for a, b in zip(f[:h], f[h:]))
-    sub0 = undo_submask_sum(f0)
-    sub1 = undo_submask_sum(f1)
-    return sub0 + sub1
+    return tuple(undo_submask_sum_inplace(list(f)))
+
+
+def is_ndarray(buf):
+    return hasattr(buf, "reshape") and hasattr(buf, "flags")
+
+
+def butterfly_levels(arr, axis=0):
+    """
+    Yield (lo, hi) views of a numpy array for each butterfly level
+    along @axis: lo[..., j] and hi[..., j] are entries x and x | h.
+    """
+    axis %= arr.ndim
+    size = arr.shape[axis]
+    assert size & (size - 1) == 0
+    assert arr.flags.c_contiguous
+    before = arr.shape[:axis]
+    after = arr.shape[axis+1:]
+    prefix = (slice(None),) * (axis + 1)
+    h = 1
+    while h < size:
+        v = arr.reshape(before + (size // (2*h), 2, h) + after)
+        yield v[prefix + (0,)], v[prefix + (1,)]
+        h *= 2
+
+
+def butterfly_pairs(size):
+    """Yield (h, i) with i ranging over the lower entries of level h."""
+    assert size & (size - 1) == 0
+    h = 1
+    while h < size:
+        for base in range(0, size, 2*h):
+            yield h, range(base, base + h)
+        h *= 2
+
+
+def mobius_inplace(buf, axis=0):
+    """(a, b) -> (a, a ^ b) on all levels."""
+    if is_ndarray(buf):
+        for lo, hi in butterfly_levels(buf, axis):
+            hi ^= lo
+        return buf
+    for h, lows in butterfly_pairs(len(buf)):
+        for i in lows:
+            buf[i + h] ^= buf[i]
+    return buf
+
+
+def walsh_inplace(buf, axis=0):
+    """
+    (a, b) -> (a + b, a - b) on all levels.
+    For numpy arrays, the dtype must hold twice the largest
+    absolute output value.
+    """
+    if is_ndarray(buf):
+        for lo, hi in butterfly_levels(buf, axis):
+            lo += hi
+            hi *= -2
+            hi += lo
+        return buf
+    for h, lows in butterfly_pairs(len(buf)):
+        for i in lows:
+            a = buf[i]
+            b = buf[i + h]
+            buf[i] = a + b
+            buf[i + h] = a - b
+    return buf
+
+
+def submask_sum_inplace(buf, axis=0):
+    """(a, b) -> (a, a + b) on all levels."""
+    if is_ndarray(buf):
+        for lo, hi in butterfly_levels(buf, axis):
+            hi += lo
+        return buf
+    for h, lows in butterfly_pairs(len(buf)):
+        for i in lows:
+            buf[i + h] += buf[i]
+    return buf
+
+
+def undo_submask_sum_inplace(buf, axis=0):
+    """(a, b) -> (a, a - b) on all levels."""
+    if is_ndarray(buf):
+        for lo, hi in butterfly_levels(buf, axis):
+            hi *= -1
+            hi += lo
+        return buf
+    for h, lows in butterfly_pairs(len(buf)):
+        for i in lows:
+            buf[i + h] = buf[i] - buf[i + h]
+    return buf
+
+
+@lru_cache(maxsize=None)
+def low_mask(n, i):
+    """Bits x < 2^n such that bit @i of x is zero."""
+    h = 1 << i
+    mask = (1 << h) - 1
+    width = 2 * h
+    while width < (1 << n):
+        mask |= mask << width
+        width *= 2
+    return mask
+
+
+def mobius_packed(tt, n):
+    """
+    Mobius transform of a Boolean function with @n inputs,
+    packed into an integer (bit x holds f(x)).
+    Each level is a single shift/and/xor over the whole truth table.
+    """
+    for i in range(n):
+        tt ^= (tt & low_mask(n, i)) << (1 << i)
+    return tt
+
+
+def pack(bits):
+    """Pack a 0/1 sequence into an integer, bit x = bits[x]."""
+    return int("".join("1" if b else "0" for b in reversed(bits)) or "0", 2)
+
+
+def unpack(tt, n):
+    """Unpack an integer into a list of 2^n bits."""
+    return [(tt >> x) & 1 for x in range(1 << n)]
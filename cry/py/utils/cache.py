@@ -4,6 +4,7 @@ import sys
 import ast, pickle, marshal
 import random
 from functools import wraps
+from collections import OrderedDict
 import hashlib
 H = lambda s: hashlib.sha256(s).hexdigest()
 
@@ -126,3 +127,112 @@ def marshal_cache_iter(filename_prefix_or_func):
         return deco
     else:
         return deco(filename_prefix_or_func)
+
+
+def deep_sizeof(obj):
+    """
+    Approximate memory footprint of @obj in bytes: .nbytes for arrays,
+    recursive sys.getsizeof for builtin containers.
+    """
+    nbytes = getattr(obj, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        size += sum(map(deep_sizeof, obj))
+    elif isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    return size
+
+
+class SizedCache(object):
+    """
+    LRU dict bounded by the total size of stored values (in bytes).
+    Values larger than the limit are simply not stored.
+
+    >>> c = SizedCache(limit=1000)
+    >>> c.put("a", bytes(600))
+    >>> c.put("b", bytes(600))
+    >>> "a" in c, "b" in c, len(c)
+    (False, True, 1)
+    >>> c.put("c", bytes(2000))
+    >>> "c" in c
+    False
+    >>> c.clear(); c.size
+    0
+    """
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.data = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            return default
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def put(self, key, value):
+        self.pop(key)
+        size = deep_sizeof(value)
+        if self.limit is not None and size > self.limit:
+            return
+        while self.limit is not None and self.size + size > self.limit:
+            self.pop(next(iter(self.data)))
+        self.data[key] = value
+        self.sizes[key] = size
+        self.size += size
+
+    def pop(self, key):
+        if key in self.data:
+            del self.data[key]
+            self.size -= self.sizes.pop(key)
+
+    def clear(self):
+        self.data.clear()
+        self.sizes.clear()
+        self.size = 0
+
+
+def method_cache_key(name, a=(), k=None):
+    """Key of a cached_method call name(*a, **k) in the instance cache."""
+    return (name,) + tuple(a) + tuple(sorted((k or {}).items()))
+
+
+def is_cached(obj, name, *a, **k):
+    """
+    Whether the cached_method @name of @obj currently holds a value
+    for the arguments @a, @k (without computing it).
+    """
+    cache = obj.__dict__.get("_cache")
+    return cache is not None and method_cache_key(name, a, k) in cache
+
+
+def cached_method(func):
+    """
+    Memoize a method of an immutable object in a per-instance SizedCache
+    (attribute _cache, created on first use with limit self.CACHE_LIMIT).
+    Cached numpy arrays are made read-only since they are shared.
+    Use is_cached to test for a cached value.
+    """
+    @wraps(func)
+    def wrapper(self, *a, **k):
+        cache = self.__dict__.get("_cache")
+        if cache is None:
+            cache = self._cache = SizedCache(getattr(self, "CACHE_LIMIT", None))
+        key = method_cache_key(func.__name__, a, k)
+        if key in cache:
+            return cache.get(key)
+        res = func(self, *a, **k)
+        if hasattr(res, "flags"):
+            res.flags.writeable = False
+        cache.put(key, res)
+        return res
+    return wrapper
@@ -0,0 +1,74 @@
+"""
+Streaming export of ANFs as monomial masks.
+
+A monomial mask u over n variables stands for the product of x_j over
+the bits j of u set at position n-1-j (x0 is the most significant bit),
+as in SBox2.anfs(). Coordinates are listed most significant first.
+
+Text format:
+    first line "n m", then one line per coordinate with its monomial
+    masks in increasing order, in decimal, separated by spaces
+    (an empty line for a zero coordinate).
+
+Binary format (all integers little-endian uint32):
+    magic b"ANF1", n, m, then for each coordinate the number of
+    monomials followed by the monomial masks in increasing order.
+
+>>> import io
+>>> f = io.StringIO()
+>>> write_anf_masks(f, [[3], [0, 1, 2]], 2, 2)
+>>> print(f.getvalue(), end="")
+2 2
+3
+0 1 2
+>>> _ = f.seek(0)
+>>> n, m, masks = read_anf_masks(f)
+>>> n, m, [a.tolist() for a in masks]
+(2, 2, [[3], [0, 1, 2]])
+"""
+import numpy as np
+
+MAGIC = b"ANF1"
+WORD = np.dtype("<u4")
+
+
+def write_anf_masks(f, masks, n, m, binary=False):
+    """
+    Write an iterable of monomial mask arrays (one per coordinate)
+    to the file object @f, which must be opened in binary mode for
+    the binary format and in text mode otherwise.
+    """
+    if binary:
+        f.write(MAGIC)
+        f.write(np.array([n, m], dtype=WORD).tobytes())
+        for arr in masks:
+            arr = np.asarray(arr, dtype=WORD)
+            f.write(np.array([len(arr)], dtype=WORD).tobytes())
+            f.write(arr.tobytes())
+        return
+    print(n, m, file=f)
+    for arr in masks:
+        print(*np.asarray(arr).tolist(), file=f)
+
+
+def read_anf_masks(f, binary=False):
+    """
+    Read a file object written by write_anf_masks.
+    Returns (n, m, generator of mask arrays).
+    """
+    if binary:
+        assert f.read(len(MAGIC)) == MAGIC, "not an ANF file"
+        n, m = np.frombuffer(f.read(8), dtype=WORD).tolist()
+
+        def masks():
+            for _ in range(m):
+                count = int(np.frombuffer(f.read(4), dtype=WORD)[0])
+                yield np.frombuffer(f.read(4 * count), dtype=WORD)
+        return n, m, masks()
+
+    n, m = map(int, f.readline().split())
+
+    def masks():
+        for _ in range(m):
+            yield np.array(f.readline().split(), dtype=np.int64)
+    return n, m, masks()
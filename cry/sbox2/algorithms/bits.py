@@ -0,0 +1,71 @@
+"""
+Bit manipulation on integer numpy arrays.
+"""
+import numpy as np
+
+M1 = np.uint64(0x5555555555555555)
+M2 = np.uint64(0x3333333333333333)
+M4 = np.uint64(0x0f0f0f0f0f0f0f0f)
+H01 = np.uint64(0x0101010101010101)
+
+
+def popcount(arr):
+    """
+    Hamming weights of the entries of an integer array (as uint8).
+
+    >>> popcount([0, 1, 3, 255, 2**64 - 1]).tolist()
+    [0, 1, 2, 8, 64]
+    """
+    x = np.array(arr, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    x -= (x >> np.uint64(1)) & M1
+    x = (x & M2) + ((x >> np.uint64(2)) & M2)
+    x = (x + (x >> np.uint64(4))) & M4
+    return ((x * H01) >> np.uint64(56)).astype(np.uint8)
+
+
+def by_weight(size, start=0):
+    """
+    Integers in range(@start, @size) sorted by Hamming weight, then value.
+
+    >>> by_weight(8, start=1).tolist()
+    [1, 2, 4, 3, 5, 6, 7]
+    """
+    xs = np.arange(start, size)
+    return xs[np.argsort(popcount(xs), kind="stable")]
+
+
+def bitslice(table, m):
+    """
+    Bit-sliced coordinates of a lookup table: one integer per output bit
+    (most significant first), with bit x holding that bit of table[x].
+
+    >>> [bin(tt) for tt in bitslice([0, 1, 3, 2], 2)]
+    ['0b1100', '0b110']
+    """
+    S = np.asarray(table)
+    res = []
+    for i in reversed(range(m)):
+        bits = ((S >> i) & 1).astype(np.uint8)
+        packed = np.packbits(bits, bitorder="little").tobytes()
+        res.append(int.from_bytes(packed, "little"))
+    return res
+
+
+def unslice(tt, size):
+    """
+    Truth table of length @size packed in the integer @tt, as uint8 array.
+
+    >>> unslice(0b110, 4).tolist()
+    [0, 1, 1, 0]
+    """
+    packed = tt.to_bytes((size + 7) // 8, "little")
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8),
+                         bitorder="little")
+    return bits[:size].copy()
+
+
+def int_weight(tt):
+    """Hamming weight of a (nonnegative) Python integer."""
+    return bin(tt).count("1")
@@ -0,0 +1,208 @@
+"""
+Difference distribution tables computed with batched array operations.
+
+S-boxes are given as integer lookup tables (any sequence or numpy array),
+tables are returned as compact numpy arrays indexed [dx, dy].
+"""
+import os
+from collections import Counter
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .bits import by_weight
+
+# maximum number of (x, dx) pairs evaluated at once
+BLOCK_SIZE = 1 << 20
+
+
+def as_index_array(table):
+    """Lookup table as an int64 array, suitable for fancy indexing."""
+    return np.asarray(table).astype(np.int64, copy=False)
+
+
+def count_dtype(size):
+    """Smallest unsigned dtype able to hold counts up to @size."""
+    return np.min_scalar_type(size)
+
+
+def ddt_rows(table, m, dxs):
+    """
+    Rows of the DDT for input differences @dxs,
+    as a len(dxs) x 2^m int64 array.
+    """
+    S = as_index_array(table)
+    dxs = np.asarray(dxs, dtype=np.int64)
+    xs = np.arange(len(S), dtype=np.int64)
+    dys = S[np.bitwise_xor.outer(dxs, xs)] ^ S
+    dys += (np.arange(len(dxs), dtype=np.int64) << m)[:, None]
+    res = np.bincount(dys.ravel(), minlength=len(dxs) << m)
+    return res.reshape(len(dxs), 1 << m)
+
+
+def row_blocks(size, step=None):
+    """Split range(@size) into consecutive blocks of at most @step rows."""
+    if step is None:
+        step = max(1, BLOCK_SIZE // size)
+    for lo in range(0, size, step):
+        yield range(lo, min(size, lo + step))
+
+
+def ddt(table, m, zero_zero=False):
+    """
+    Full DDT of the S-box given by @table with @m output bits.
+
+    >>> ddt([0, 1, 3, 2], 2).tolist()
+    [[4, 0, 0, 0], [0, 4, 0, 0], [0, 0, 0, 4], [0, 0, 4, 0]]
+    """
+    S = as_index_array(table)
+    res = np.empty((len(S), 1 << m), dtype=count_dtype(len(S)))
+    for dxs in row_blocks(len(S)):
+        res[dxs.start:dxs.stop] = ddt_rows(S, m, dxs)
+    if zero_zero:
+        res[0, 0] = 0
+    return res
+
+
+def ddt_distrib(table, m, zero_zero=False):
+    """
+    Counter of DDT values, without storing the whole table.
+
+    >>> sorted(ddt_distrib([0, 1, 3, 2], 2, zero_zero=True).items())
+    [(0, 13), (4, 3)]
+    """
+    S = as_index_array(table)
+    counts = np.zeros(len(S) + 1, dtype=np.int64)
+    for dxs in row_blocks(len(S)):
+        rows = ddt_rows(S, m, dxs)
+        counts += np.bincount(rows.ravel(), minlength=len(S) + 1)
+    if zero_zero:
+        counts[len(S)] -= 1
+        counts[0] += 1
+    return Counter({v: int(c) for v, c in enumerate(counts) if c})
+
+
+# below this table size, process pools cost more than they save
+PARALLEL_MIN_SIZE = 1 << 10
+
+_worker_table = None
+_worker_m = None
+
+
+def _attach_shared(name, size, dtype):
+    global _worker_table
+    # pool workers share the resource tracker of the parent,
+    # which unlinks the segment
+    shm = SharedMemory(name=name)
+    _worker_table = (shm, np.ndarray((size,), dtype=dtype, buffer=shm.buf))
+
+
+def _distrib_rows(args):
+    lo, hi, m = args
+    S = _worker_table[1]
+    rows = ddt_rows(S, m, range(lo, hi))
+    return np.bincount(rows.ravel(), minlength=len(S) + 1)
+
+
+def ddt_distrib_parallel(table, m, zero_zero=False, processes=None):
+    """
+    Same as ddt_distrib, with blocks of input differences spread over
+    a process pool. Workers read the table from shared memory and send
+    back only value counts of their rows.
+    """
+    S = as_index_array(table)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(S) < PARALLEL_MIN_SIZE:
+        return ddt_distrib(S, m, zero_zero=zero_zero)
+
+    step = max(1, min(BLOCK_SIZE // len(S), len(S) // (4 * processes)))
+    tasks = [(dxs.start, dxs.stop, m) for dxs in row_blocks(len(S), step)]
+    counts = np.zeros(len(S) + 1, dtype=np.int64)
+    shm = SharedMemory(create=True, size=S.nbytes)
+    try:
+        np.ndarray(S.shape, dtype=S.dtype, buffer=shm.buf)[:] = S
+        with Pool(
+            processes,
+            initializer=_attach_shared,
+            initargs=(shm.name, len(S), S.dtype),
+        ) as pool:
+            for part in pool.imap_unordered(_distrib_rows, tasks):
+                counts += part
+    finally:
+        shm.close()
+        shm.unlink()
+    if zero_zero:
+        counts[len(S)] -= 1
+        counts[0] += 1
+    return Counter({v: int(c) for v, c in enumerate(counts) if c})
+
+
+def _max_rows(dxs):
+    S = _worker_table[1]
+    return int(ddt_rows(S, _worker_m, dxs).max())
+
+
+def _set_shared(name, size, dtype, m):
+    global _worker_m
+    _attach_shared(name, size, dtype)
+    _worker_m = m
+
+
+def difference_blocks(size):
+    """Blocks of nonzero input differences of growing size, low weights first."""
+    dxs = by_weight(size, start=1)
+    step = 1
+    lo = 0
+    while lo < len(dxs):
+        yield dxs[lo:lo+step]
+        lo += step
+        step = min(2 * step, max(1, BLOCK_SIZE // size))
+
+
+def differential_uniformity(table, m, bound=None, processes=1):
+    """
+    max DDT[dx, dy] over dx != 0.
+
+    Rows are computed in blocks of growing size, low-weight input
+    differences first. With @bound, the search stops at the first block
+    containing an entry above it, so the result is exact only if it is
+    at most @bound (otherwise it is just some entry above @bound).
+    Blocks are spread over @processes workers (None = all cores), which
+    read the table from shared memory.
+
+    >>> differential_uniformity([0, 1, 3, 6, 7, 4, 5, 2], 3)
+    2
+    >>> differential_uniformity(range(256), 8, bound=2)
+    256
+    """
+    S = as_index_array(table)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    res = 0
+    if processes <= 1 or len(S) < PARALLEL_MIN_SIZE:
+        for block in difference_blocks(len(S)):
+            res = max(res, int(ddt_rows(S, m, block).max()))
+            if bound is not None and res > bound:
+                break
+        return res
+
+    shm = SharedMemory(create=True, size=S.nbytes)
+    try:
+        np.ndarray(S.shape, dtype=S.dtype, buffer=shm.buf)[:] = S
+        with Pool(
+            processes,
+            initializer=_set_shared,
+            initargs=(shm.name, len(S), S.dtype, m),
+        ) as pool:
+            blocks = difference_blocks(len(S))
+            for part in pool.imap_unordered(_max_rows, blocks):
+                res = max(res, part)
+                if bound is not None and res > bound:
+                    # leaving the pool context terminates remaining work
+                    break
+    finally:
+        shm.close()
+        shm.unlink()
+    return res
@@ -0,0 +1,75 @@
+"""
+Algebraic degrees read off the ANF table (the Mobius transform of the
+lookup table): entry u holds the coefficients of the monomial x^u in all
+coordinates, so coordinate degrees are maximal weights of monomials whose
+bit is set.
+"""
+import numpy as np
+
+from .bits import popcount
+
+
+def degree_masks(anf, n):
+    """
+    List res[d] = OR of the ANF entries of all monomials of degree d,
+    i.e. the mask of coordinates containing some monomial of degree d.
+
+    >>> degree_masks([0, 1, 1, 2], 2)
+    [0, 1, 2]
+    """
+    anf = np.asarray(anf)
+    weights = popcount(np.arange(len(anf)))
+    return [
+        int(np.bitwise_or.reduce(anf[weights == d], initial=0))
+        for d in range(n + 1)
+    ]
+
+
+def degrees(anf, n, m):
+    """
+    Degrees of the @m coordinates (most significant first),
+    -1 for zero coordinates.
+
+    >>> degrees([0, 1, 1, 2], 2, 2)
+    (2, 1)
+    >>> degrees([1, 0, 0, 0], 2, 2)
+    (-1, 0)
+    """
+    masks = degree_masks(anf, n)
+    res = []
+    for i in reversed(range(m)):
+        res.append(max(
+            (d for d, mask in enumerate(masks) if mask >> i & 1),
+            default=-1,
+        ))
+    return tuple(res)
+
+
+def min_degree(anf, n, m):
+    """
+    Minimum degree of nonzero-mask components <b, S>.
+
+    A component has degree >= d iff b is not orthogonal to all ANF entries
+    of monomials of degree >= d, so the minimum degree is the largest d for
+    which these entries span the whole space (-1 if even all of them do not,
+    i.e. some component is zero).
+
+    >>> min_degree([0, 1, 1, 2], 2, 2)
+    1
+    >>> min_degree([0, 3, 3, 0], 2, 2)
+    -1
+    """
+    anf = np.asarray(anf)
+    weights = popcount(np.arange(len(anf)))
+    basis = {}
+    for d in reversed(range(n + 1)):
+        for v in np.unique(anf[weights == d]).tolist():
+            while v:
+                top = v.bit_length() - 1
+                if top not in basis:
+                    basis[top] = v
+                    break
+                v ^= basis[top]
+        if len(basis) == m:
+            return d
+    return -1
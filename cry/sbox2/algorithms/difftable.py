@@ -0,0 +1,135 @@
+"""
+Generalized difference tables: counts of (x, dx) pairs by output difference
+for XOR, modular addition and finite field multiplication differences.
+
+For an input operator * and an output operator / , the table is
+    T[dx, dy] = #{x : S(x * dx) / S(x) = dy}
+over the operator's range of x and dx (nonzero for xor/add; x >= 1 and
+dx >= 2 for cmul, as multiplication by 0 or 1 is trivial).
+Field multiplication uses log/exp tables of GF(2^n): exp[i] = g^i for a
+generator g (len(exp) = 2^n - 1) and log[exp[i]] = i; an output division
+by zero gives 0, as 0 has "inverse" 0^(2^n-2) = 0.
+
+>>> from cry.sbox2.algorithms.ddt import ddt
+>>> S = [0, 1, 3, 6, 7, 4, 5, 2]
+>>> T = difference_table(S, 3, 3, "xor", "xor")
+>>> bool((T[1:] == ddt(S, 3)[1:]).all())
+True
+>>> difference_table([0, 1, 3, 2], 2, 2, "add", "add").tolist()
+[[0, 0, 0, 0], [0, 1, 2, 1], [0, 2, 0, 2], [0, 1, 2, 1]]
+
+GF(2^2) with modulus x^2 + x + 1 and generator x:
+
+>>> exp = np.array([1, 2, 3]); log = np.array([0, 0, 1, 2])
+>>> difference_table([0, 1, 2, 3], 2, 2, "cmul", "cmul", log, exp).tolist()
+[[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 3, 0], [0, 0, 0, 3]]
+"""
+import numpy as np
+
+from cry.py.anf.mobius import walsh_inplace
+
+from .ddt import as_index_array, row_blocks, count_dtype, BLOCK_SIZE
+from .lat import lat
+
+OPERATORS = ("xor", "add", "cmul")
+
+
+def field_mul(a, b, log, exp):
+    """Elementwise product in GF(2^n) given by log/exp tables."""
+    res = exp[(log[a] + log[b]) % len(exp)]
+    return np.where((a == 0) | (b == 0), 0, res)
+
+
+def field_div(a, b, log, exp):
+    """Elementwise a / b in GF(2^n), with x / 0 = 0."""
+    res = exp[(log[a] - log[b]) % len(exp)]
+    return np.where((a == 0) | (b == 0), 0, res)
+
+
+def apply_input(op, xs, dxs, n, log=None, exp=None):
+    """len(dxs) x len(xs) array of x * dx."""
+    xs = xs[None, :]
+    dxs = dxs[:, None]
+    if op == "xor":
+        return xs ^ dxs
+    if op == "add":
+        return (xs + dxs) & ((1 << n) - 1)
+    if op == "cmul":
+        return field_mul(xs, dxs, log, exp)
+    raise ValueError(f"unknown difference operator {op!r}")
+
+
+def apply_output(op, ys, ys2, m, log=None, exp=None):
+    """Output differences ys2 / ys."""
+    if op == "xor":
+        return ys ^ ys2
+    if op == "add":
+        return (ys2 - ys) & ((1 << m) - 1)
+    if op == "cmul":
+        return field_div(ys2, ys, log, exp)
+    raise ValueError(f"unknown difference operator {op!r}")
+
+
+def difference_table(table, n, m, din="xor", dout="xor", log=None, exp=None):
+    """
+    Table T[dx, dy] of the S-box given by @table (n -> m bits) for
+    the input operator @din and the output operator @dout
+    (see the module docstring). @log and @exp are required for "cmul".
+    """
+    if "cmul" in (din, dout):
+        assert log is not None and exp is not None, "field tables required"
+        log = as_index_array(log)
+        exp = as_index_array(exp)
+    if dout == "cmul":
+        assert len(log) >= 1 << m, "outputs do not fit in the field"
+
+    S = as_index_array(table)
+    first = 1 if din == "cmul" else 0
+    xs = np.arange(first, len(S), dtype=np.int64)
+    ys = S[xs]
+    res = np.zeros((len(S), 1 << m), dtype=count_dtype(len(S)))
+    step = max(1, BLOCK_SIZE // len(S))
+    start = 2 if din == "cmul" else 1
+    for dxs in row_blocks(len(S) - start, step):
+        dxs = np.arange(dxs.start + start, dxs.stop + start, dtype=np.int64)
+        x2 = apply_input(din, xs, dxs, n, log, exp)
+        dys = apply_output(dout, ys[None, :], S[x2], m, log, exp)
+        dys += ((dxs - dxs[0]) << m)[:, None]
+        counts = np.bincount(dys.ravel(), minlength=len(dxs) << m)
+        res[dxs[0]:dxs[-1]+1] = counts.reshape(len(dxs), 1 << m)
+    return res
+
+
+def kddt(table, n, m, k=3):
+    """
+    T[dx, dy] = number of k-subsets {x_1, ..., x_k} with
+    XOR x_i = dx and XOR S(x_i) = dy.
+
+    The subsets are the k-th elementary symmetric polynomial of the graph
+    points in the group algebra of F_2^(n+m), obtained from power sums
+    (odd powers give the graph, even ones N times the unit) by Newton's
+    identities, pointwise in the Walsh domain.
+
+    >>> T = kddt([0, 1, 3, 2], 2, 2, k=3)
+    >>> T.tolist()
+    [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]]
+    >>> int(kddt([0, 1, 3, 6, 7, 4, 5, 2], 3, 3, k=2).max())
+    1
+    """
+    S = as_index_array(table)
+    N = len(S)
+    W = lat(S, m).astype(object)
+    elem = [np.ones_like(W)]
+    for j in range(1, k + 1):
+        acc = np.zeros_like(W)
+        for i in range(1, j + 1):
+            if i & 1:
+                acc += elem[j - i] * W
+            else:
+                acc -= elem[j - i] * N
+        elem.append(acc // j)
+    res = elem[k]
+    walsh_inplace(res, axis=0)
+    walsh_inplace(res, axis=1)
+    res //= N << m
+    return res.astype(np.int64)
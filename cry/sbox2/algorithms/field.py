@@ -0,0 +1,218 @@
+"""
+Arithmetic in GF(2^n) on integer arrays through log/exp tables.
+
+Field elements are integers whose bits are the coefficients of polynomials
+modulo the irreducible @modulus (bit i = coefficient of a^i), matching
+Sage's fetch_int / integer_representation. Tables are built once per
+(n, modulus) and shared, which is practical up to n = 16 or so.
+
+>>> F = gf2n(3, 0b1011)
+>>> F.mul([3, 5], 6).tolist()
+[1, 3]
+>>> F.inv(range(8)).tolist()
+[0, 1, 5, 6, 7, 2, 3, 4]
+>>> F.pow(range(8), 3).tolist()
+[0, 1, 3, 4, 5, 6, 7, 2]
+>>> gf2n(4, 0b11111).generator  # x is not primitive for x^4+x^3+x^2+x+1
+3
+>>> F.evaluate({3: 1, 1: 2, 0: 1}).tolist()  # x^3 + a*x + 1
+[1, 2, 6, 3, 7, 6, 1, 6]
+>>> cyclotomic_leaders(4)
+[1, 3, 5, 7]
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+def clmul(a, b):
+    """Carry-less product of two integers."""
+    res = 0
+    while b:
+        if b & 1:
+            res ^= a
+        a <<= 1
+        b >>= 1
+    return res
+
+
+def polymod(a, modulus):
+    """Remainder of binary polynomials."""
+    deg = modulus.bit_length() - 1
+    while a.bit_length() - 1 >= deg:
+        a ^= modulus << (a.bit_length() - 1 - deg)
+    return a
+
+
+def polygcd(a, b):
+    while b:
+        a, b = b, polymod(a, b)
+    return a
+
+
+def prime_factors(num):
+    res = []
+    p = 2
+    while p * p <= num:
+        if num % p == 0:
+            res.append(p)
+            while num % p == 0:
+                num //= p
+        p += 1
+    if num > 1:
+        res.append(num)
+    return res
+
+
+def is_irreducible(modulus):
+    """
+    Rabin's test: x^(2^n) = x mod f and gcd(x^(2^(n/q)) - x, f) = 1
+    for all primes q | n.
+    """
+    n = modulus.bit_length() - 1
+    if n < 1:
+        return False
+
+    def frobenius(k):
+        a = 2
+        for _ in range(k):
+            a = polymod(clmul(a, a), modulus)
+        return a
+
+    if polymod(frobenius(n) ^ 2, modulus) != 0:
+        return False
+    return all(
+        polygcd(modulus, frobenius(n // q) ^ 2) == 1
+        for q in prime_factors(n)
+    )
+
+
+class GF2n(object):
+    """
+    GF(2^n) given by an irreducible @modulus (as an integer, bit i is
+    the coefficient of X^i). exp[i] = g^i for the smallest generator g,
+    log[exp[i]] = i (log[0] is unused and set to 0).
+    """
+    def __init__(self, n, modulus):
+        assert modulus.bit_length() - 1 == n
+        if not is_irreducible(modulus):
+            raise ValueError(f"modulus {modulus:#x} is not irreducible")
+        self.n = n
+        self.modulus = modulus
+        self.order = 1 << n
+        self.generator, exp = self._find_generator()
+        self.exp = np.array(exp, dtype=np.int64)
+        self.exp.flags.writeable = False
+        self.log = np.zeros(self.order, dtype=np.int64)
+        self.log[self.exp] = np.arange(len(self.exp))
+        self.log.flags.writeable = False
+
+    def _powers(self, g):
+        """Powers of @g until 1 repeats, None if the order is not maximal."""
+        res = []
+        cur = 1
+        for _ in range(self.order - 1):
+            res.append(cur)
+            cur = polymod(clmul(cur, g), self.modulus)
+            if cur == 1:
+                break
+        if len(res) != self.order - 1:
+            return None
+        return res
+
+    def _find_generator(self):
+        if self.n == 1:
+            return 1, [1]
+        for g in range(2, self.order):
+            exp = self._powers(g)
+            if exp is not None:
+                return g, exp
+        raise ValueError("no generator found")
+
+    def __repr__(self):
+        return f"GF2n({self.n}, {self.modulus:#x})"
+
+    def mul(self, a, b):
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        res = self.exp[(self.log[a] + self.log[b]) % len(self.exp)]
+        return np.where((a == 0) | (b == 0), 0, res)
+
+    def div(self, a, b):
+        """a / b, with a / 0 = 0."""
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        res = self.exp[(self.log[a] - self.log[b]) % len(self.exp)]
+        return np.where((a == 0) | (b == 0), 0, res)
+
+    def inv(self, a):
+        """a^(2^n-2), i.e. 1/a with 0 mapped to 0."""
+        return self.div(1, a)
+
+    def mul_table(self):
+        """2^n x 2^n multiplication table."""
+        xs = np.arange(self.order)
+        return self.mul(xs[:, None], xs[None, :])
+
+    def pow(self, a, e):
+        """a^e for an integer e >= 0 (0^0 = 1)."""
+        a = np.asarray(a, dtype=np.int64)
+        if e == 0:
+            return np.ones_like(a)
+        res = self.exp[(self.log[a] * (e % len(self.exp))) % len(self.exp)]
+        return np.where(a == 0, 0, res)
+
+    def evaluate(self, terms, xs=None):
+        """
+        Polynomial sum c * x^e over (e, c) in @terms (a dict or pairs of
+        integers), evaluated at @xs (the whole field by default).
+        Each term costs one table lookup per point, whatever its degree.
+        """
+        if isinstance(terms, dict):
+            terms = terms.items()
+        if xs is None:
+            xs = np.arange(self.order)
+        xs = np.asarray(xs, dtype=np.int64)
+        logx = self.log[xs]
+        nonzero = xs != 0
+        res = np.zeros(xs.shape, dtype=np.int64)
+        for e, c in terms:
+            if c == 0:
+                continue
+            if e == 0:
+                res ^= c
+                continue
+            e %= len(self.exp)
+            term = self.exp[(self.log[c] + logx * e) % len(self.exp)]
+            res ^= np.where(nonzero, term, 0)
+        return res
+
+
+def cyclotomic_leaders(n):
+    """
+    Smallest exponents of the classes {e * 2^i mod 2^n - 1} of nonzero
+    exponents: power maps x^e within a class are linearly equivalent.
+    """
+    order = (1 << n) - 1
+    res = []
+    for e in range(1, order):
+        if all((e << i) % order >= e for i in range(1, n)):
+            res.append(e)
+    return res
+
+
+@lru_cache(maxsize=None)
+def gf2n(n, modulus):
+    """Shared GF2n instance for (@n, @modulus)."""
+    return GF2n(n, modulus)
+
+
+def field_modulus(F):
+    """Modulus of a Sage field GF(2^n) as an integer."""
+    assert F.characteristic() == 2
+    return sum(int(c) << i for i, c in enumerate(F.modulus().list()))
+
+
+def gf2n_of(F):
+    """Shared GF2n instance matching the Sage field @F."""
+    return gf2n(int(F.degree()), field_modulus(F))
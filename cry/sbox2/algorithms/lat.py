@@ -0,0 +1,127 @@
+"""
+Linear approximation tables computed by a fast Walsh-Hadamard transform
+of the S-box graph indicator, for all components at once.
+
+LAT[a, b] = sum_x (-1)^(a.x + b.S(x))
+"""
+import os
+from collections import Counter
+from multiprocessing import Pool
+
+import numpy as np
+
+from cry.py.anf.mobius import walsh_inplace
+
+from .bits import popcount, by_weight
+
+# maximum number of Walsh coefficients computed at once
+BLOCK_SIZE = 1 << 20
+
+
+def as_table(table):
+    return np.asarray(table).astype(np.int64, copy=False)
+
+
+def walsh_dtype(size):
+    """Smallest signed dtype for Walsh transforms of @size points."""
+    return np.min_scalar_type(-2 * size - 1)
+
+
+def lat(table, m, zero_zero=False, abs=False):
+    """
+    Full LAT of the S-box given by @table with @m output bits,
+    as a 2^n x 2^m array indexed [input mask, output mask].
+    Complexity: O((n + m) 2^(n+m)).
+
+    >>> lat([0, 1, 3, 2], 2).tolist()
+    [[4, 0, 0, 0], [0, 0, 0, 4], [0, 0, 4, 0], [0, 4, 0, 0]]
+    """
+    S = as_table(table)
+    res = np.zeros((len(S), 1 << m), dtype=walsh_dtype(len(S)))
+    res[np.arange(len(S)), S] = 1
+    walsh_inplace(res, axis=0)
+    walsh_inplace(res, axis=1)
+    if zero_zero:
+        res[0, 0] = 0
+    if abs:
+        np.abs(res, out=res)
+    return res
+
+
+def table_distrib(arr):
+    """Counter of values of a table given as numpy array."""
+    values, counts = np.unique(arr, return_counts=True)
+    return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+
+# below this table size, process pools cost more than they save
+PARALLEL_MIN_SIZE = 1 << 10
+
+_worker_table = None
+
+
+def _set_table(table):
+    global _worker_table
+    _worker_table = table
+
+
+def components_linearity(table, masks):
+    """
+    max |W(a, b)| over all a and the output masks b in @masks,
+    transforming the components (-1)^(b.S(x)) in one 2D array.
+    """
+    S = as_table(table)
+    masks = np.asarray(masks, dtype=np.int64)
+    signs = popcount(np.bitwise_and.outer(masks, S)) & 1
+    res = np.ones(signs.shape, dtype=walsh_dtype(len(S)))
+    res -= 2 * signs.astype(res.dtype)
+    walsh_inplace(res, axis=1)
+    return int(np.abs(res).max())
+
+
+def _components_linearity(masks):
+    return components_linearity(_worker_table, masks)
+
+
+def mask_blocks(size, m):
+    """Blocks of nonzero output masks of growing size, low weights first."""
+    masks = by_weight(1 << m, start=1)
+    step = 1
+    lo = 0
+    while lo < len(masks):
+        yield masks[lo:lo+step]
+        lo += step
+        step = min(2 * step, max(1, BLOCK_SIZE // size))
+
+
+def linearity(table, m, bound=None, processes=1):
+    """
+    max |W(a, b)| over b != 0, one block of components at a time
+    (low-weight masks first). With @bound, stops as soon as a coefficient
+    exceeds it, so the result is exact only if it is at most @bound.
+    Components are spread over @processes workers (None = all cores).
+
+    >>> linearity([0, 1, 3, 6, 7, 4, 5, 2], 3)
+    4
+    >>> linearity(range(256), 8, bound=16)
+    256
+    """
+    S = as_table(table)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    res = 0
+    if processes <= 1 or len(S) < PARALLEL_MIN_SIZE:
+        for masks in mask_blocks(len(S), m):
+            res = max(res, components_linearity(S, masks))
+            if bound is not None and res > bound:
+                break
+        return res
+
+    with Pool(processes, initializer=_set_table, initargs=(S,)) as pool:
+        blocks = mask_blocks(len(S), m)
+        for part in pool.imap_unordered(_components_linearity, blocks):
+            res = max(res, part)
+            if bound is not None and res > bound:
+                # leaving the pool context terminates remaining work
+                break
+    return res
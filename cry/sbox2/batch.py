@@ -0,0 +1,145 @@
+"""
+Batch analysis of S-box catalogs.
+
+S-boxes are sent to worker processes in chunks as bare lookup tables;
+each worker rebuilds an SBox2 and evaluates all requested properties on
+it, so that per-instance caches share intermediate tables between them.
+Only a bounded number of chunks is in flight at any time.
+
+>>> from cry.sbox2 import SBox2
+>>> sboxes = [SBox2([0, 1, 3, 6, 7, 4, 5, 2]), SBox2(range(8))]
+>>> for rec in analyze(sboxes, ["differential_uniformity", "linearity"]):
+...     print(rec)
+{'index': 0, 'differential_uniformity': 2, 'linearity': 4}
+{'index': 1, 'differential_uniformity': 8, 'linearity': 8}
+"""
+import os
+from ast import literal_eval
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from .sbox2 import SBox2
+
+# full tables worth building once when several requested properties use them
+SHARED_TABLES = {
+    "_ddt_array": {
+        "DDT", "DDT_distrib", "differential_uniformity", "max_ddt", "is_APN",
+    },
+    "_lat_array": {
+        "LAT", "LAT_distrib", "linearity", "max_lat", "nonlinearity",
+        "is_almost_bent", "is_bent",
+    },
+}
+
+
+def plain(value):
+    """Convert a property value into plain picklable Python data."""
+    if isinstance(value, Counter):
+        return dict(sorted(value.items()))
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return type(value)(plain(v) for v in value)
+    return value
+
+
+def evaluate(sbox, properties):
+    """Evaluate named (argument-less) methods of @sbox into a dict."""
+    for table, users in SHARED_TABLES.items():
+        if len(users.intersection(properties)) > 1:
+            getattr(sbox, table)()
+    return {name: plain(getattr(sbox, name)()) for name in properties}
+
+
+def _analyze_chunk(args):
+    start, tables, properties = args
+    res = []
+    for i, (table, m) in enumerate(tables):
+        rec = {"index": start + i}
+        rec.update(evaluate(SBox2._from_array(table, m), properties))
+        res.append(rec)
+    return res
+
+
+def as_task_table(sbox):
+    if not isinstance(sbox, SBox2):
+        sbox = SBox2(sbox)
+    return sbox._S, sbox.m
+
+
+def chunks(sboxes, properties, chunksize):
+    it = iter(sboxes)
+    start = 0
+    while True:
+        block = [as_task_table(sbox) for sbox in islice(it, chunksize)]
+        if not block:
+            return
+        yield start, block, properties
+        start += len(block)
+
+
+def analyze(sboxes, properties, processes=None, chunksize=64, pending=None):
+    """
+    Yield a record {"index": i, property: value, ...} for each S-box of
+    the iterable @sboxes (SBox2 instances or lookup tables), in order.
+
+    @properties are names of argument-less SBox2 methods. Chunks of
+    @chunksize S-boxes are spread over @processes workers (None = all
+    cores, 1 = in this process); at most @pending chunks
+    (default 2 * processes) are submitted ahead of the consumer.
+    """
+    properties = tuple(properties)
+    for name in properties:
+        if not callable(getattr(SBox2, name, None)):
+            raise ValueError(f"unknown S-box property {name!r}")
+
+    tasks = chunks(sboxes, properties, chunksize)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1:
+        for task in tasks:
+            yield from _analyze_chunk(task)
+        return
+
+    if pending is None:
+        pending = 2 * processes
+    with ProcessPoolExecutor(processes) as pool:
+        futures = deque(
+            pool.submit(_analyze_chunk, task)
+            for task in islice(tasks, pending)
+        )
+        while futures:
+            res = futures.popleft().result()
+            for task in islice(tasks, 1):
+                futures.append(pool.submit(_analyze_chunk, task))
+            yield from res
+
+
+def write_table(records, filename, properties):
+    """
+    Write analysis records to a tab-separated file with one column per
+    property (values as Python literals), streaming one row at a time.
+    Returns the number of rows written.
+    """
+    columns = ("index",) + tuple(properties)
+    count = 0
+    with open(filename, "w") as f:
+        print(*columns, sep="\t", file=f)
+        for rec in records:
+            print(*(repr(rec[col]) for col in columns), sep="\t", file=f)
+            count += 1
+    return count
+
+
+def read_table(filename):
+    """Read back records written by write_table."""
+    with open(filename) as f:
+        columns = f.readline().rstrip("\n").split("\t")
+        for line in f:
+            values = line.rstrip("\n").split("\t")
+            yield {col: literal_eval(v) for col, v in zip(columns, values)}
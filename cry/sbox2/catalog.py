@@ -0,0 +1,271 @@
+"""
+On-disk catalog of S-boxes indexed by equivalence class.
+
+Each S-box is filed under a bucket key: a hash of its invariant
+fingerprint (Equiv.invariants) or, with @representatives, of its
+linear/affine class representative. Buckets are text files in a
+directory tree
+    path/catalog            settings, as a Python literal
+    path/ab/abcdef...       one bucket, one S-box per line
+with lines
+    repr(name) <TAB> m <TAB> hex table [<TAB> hex representative]
+(tables as fixed-width hex digits per value). A lookup only reads the
+bucket of the queried S-box and runs the full equivalence test against
+its entries; with representatives, equal representatives already decide
+equivalence and no search is needed.
+
+>>> import tempfile
+>>> from cry.sbox2 import SBox2
+>>> cat = Catalog(tempfile.mkdtemp(), equiv="affine")
+>>> cube = SBox2([0, 1, 3, 6, 7, 4, 5, 2])
+>>> cat.update([("id", SBox2(range(8))), ("cube", cube)])
+2
+>>> cat.lookup(SBox2([0, 1, 2, 3, 4, 6, 7, 5]))
+>>> cat.lookup(cube.xor(3, 5))
+'cube'
+>>> len(cat)
+2
+"""
+import hashlib
+import os
+from ast import literal_eval
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .batch import plain
+from .sbox2 import SBox2
+
+EQUIVALENCES = ("xor", "linear", "affine", "ccz")
+SETTINGS_FILE = "catalog"
+
+
+def encode_table(table, m):
+    width = max(1, (m + 3) // 4)
+    return "".join(f"{y:0{width}x}" for y in table)
+
+
+def decode_table(text, m):
+    width = max(1, (m + 3) // 4)
+    return [int(text[i:i+width], 16) for i in range(0, len(text), width)]
+
+
+def class_key(sbox, equiv="affine", representatives=False):
+    """
+    (bucket key, representative or None) of @sbox for the equivalence
+    @equiv; the key is a hex digest of the invariants or representative.
+    """
+    if representatives:
+        if equiv == "linear":
+            rep = sbox.linear_representative()
+        else:
+            rep = sbox.affine_representative()
+        # plain ints: the key and the bucket lines must not depend on
+        # how SBox2 prints
+        rep = tuple(int(y) for y in rep)
+        value = sbox.input_size(), sbox.output_size(), rep
+    else:
+        rep = None
+        value = plain(sbox.invariants(equiv))
+    return hashlib.sha1(repr(value).encode()).hexdigest(), rep
+
+
+def _class_keys(args):
+    tables, equiv, representatives = args
+    return [
+        class_key(SBox2._from_array(table, m), equiv, representatives)
+        for table, m in tables
+    ]
+
+
+class Catalog(object):
+    """
+    Catalog of named S-boxes in the directory @path (created if needed),
+    bucketed for the equivalence @equiv ("xor", "linear", "affine" or
+    "ccz").
+    Without @representatives, a lookup runs an equivalence search
+    against each entry of the bucket (exponential in the worst case,
+    e.g. up to 2^(n+m) linear searches for affine equivalence).
+    With @representatives (linear and affine only), buckets are exact
+    classes keyed by canonical representatives stored with the entries:
+    a lookup needs no search, but computing the representative of each
+    new or queried S-box is expensive beyond 6-bit S-boxes.
+    Settings of an existing catalog take precedence over the arguments.
+    """
+    def __init__(self, path, equiv="affine", representatives=False):
+        self.path = path
+        settings_path = os.path.join(path, SETTINGS_FILE)
+        if os.path.exists(settings_path):
+            with open(settings_path) as f:
+                settings = literal_eval(f.read())
+            equiv = settings["equiv"]
+            representatives = settings["representatives"]
+        else:
+            if equiv not in EQUIVALENCES:
+                raise ValueError(f"unknown equivalence {equiv!r}")
+            if representatives and equiv not in ("linear", "affine"):
+                raise ValueError(f"no {equiv} class representatives")
+            os.makedirs(path, exist_ok=True)
+            with open(settings_path, "w") as f:
+                settings = dict(equiv=equiv, representatives=representatives)
+                print(repr(settings), file=f)
+        self.equiv = equiv
+        self.representatives = representatives
+
+    def __repr__(self):
+        return f"Catalog({self.path!r}, equiv={self.equiv!r})"
+
+    def key(self, sbox):
+        return class_key(sbox, self.equiv, self.representatives)[0]
+
+    def bucket_path(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def bucket(self, key):
+        """[(name, SBox2, representative or None), ...] filed under @key."""
+        res = []
+        try:
+            f = open(self.bucket_path(key))
+        except FileNotFoundError:
+            return res
+        with f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                name = literal_eval(fields[0])
+                m = int(fields[1])
+                sbox = SBox2(decode_table(fields[2], m), m=m)
+                rep = decode_table(fields[3], m) if len(fields) > 3 else None
+                res.append((name, sbox, rep))
+        return res
+
+    def keys(self):
+        for sub in sorted(os.listdir(self.path)):
+            subpath = os.path.join(self.path, sub)
+            if os.path.isdir(subpath):
+                yield from sorted(os.listdir(subpath))
+
+    def __iter__(self):
+        """Yield (name, SBox2) for all entries, bucket by bucket."""
+        for key in self.keys():
+            for name, sbox, _ in self.bucket(key):
+                yield name, sbox
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def update(self, items, processes=1, chunksize=64, pending=None):
+        """
+        Bulk insert (name, S-box) pairs from the iterable @items; names
+        are Python literals. Items are streamed in chunks of @chunksize:
+        keys are computed over @processes workers (None = all cores),
+        with at most @pending chunks (default 2 * processes) in flight,
+        and each chunk appends once to every bucket file it touches.
+        Returns the number of entries added.
+        """
+        chunks = self._chunks(items, chunksize)
+        if processes is None:
+            processes = os.cpu_count() or 1
+        count = 0
+        if processes <= 1:
+            for chunk in chunks:
+                count += self._write_chunk(chunk, _class_keys(
+                    self._task(chunk)
+                ))
+            return count
+
+        if pending is None:
+            pending = 2 * processes
+        with ProcessPoolExecutor(processes) as pool:
+            futures = deque(
+                (chunk, pool.submit(_class_keys, self._task(chunk)))
+                for chunk in islice(chunks, pending)
+            )
+            while futures:
+                chunk, future = futures.popleft()
+                keys = future.result()
+                for chunk2 in islice(chunks, 1):
+                    futures.append(
+                        (chunk2, pool.submit(_class_keys, self._task(chunk2)))
+                    )
+                count += self._write_chunk(chunk, keys)
+        return count
+
+    @staticmethod
+    def _chunks(items, chunksize):
+        items = iter(items)
+        while True:
+            chunk = [
+                (name, sbox if isinstance(sbox, SBox2) else SBox2(sbox))
+                for name, sbox in islice(items, chunksize)
+            ]
+            if not chunk:
+                return
+            yield chunk
+
+    def _task(self, chunk):
+        tables = [(sbox._S, sbox.m) for _, sbox in chunk]
+        return tables, self.equiv, self.representatives
+
+    def _write_chunk(self, chunk, keys):
+        buckets = defaultdict(list)
+        for (name, sbox), (key, rep) in zip(chunk, keys):
+            fields = [repr(name), str(sbox.m), encode_table(sbox, sbox.m)]
+            if rep is not None:
+                fields.append(encode_table(rep, sbox.m))
+            buckets[key].append("\t".join(fields))
+
+        for key, lines in buckets.items():
+            os.makedirs(os.path.dirname(self.bucket_path(key)), exist_ok=True)
+            with open(self.bucket_path(key), "a") as f:
+                for line in lines:
+                    print(line, file=f)
+        return len(chunk)
+
+    def add(self, sbox, name):
+        self.update([(name, sbox)])
+
+    def candidates(self, sbox):
+        """Entries [(name, SBox2), ...] sharing the bucket of @sbox."""
+        key, rep = class_key(sbox, self.equiv, self.representatives)
+        return [
+            (name, other) for name, other, other_rep in self.bucket(key)
+            if rep is None or other_rep == list(rep)
+        ]
+
+    def is_equivalent(self, s1, s2):
+        """
+        Equivalence of S-boxes from one bucket: their invariants already
+        match, so linear and affine go straight to the search (the
+        affine one stops at the first shift found).
+        """
+        if self.equiv == "xor":
+            return SBox2.are_XOR_equivalent(s1, s2) is not None
+        if self.equiv == "linear":
+            return bool(SBox2._linear_equivalence(s1, s2))
+        if self.equiv == "affine":
+            found = SBox2.affine_equivalences(
+                s1, s2, findall=False, processes=1
+            )
+            return next(iter(found), None) is not None
+        return bool(SBox2.are_CCZ_equivalent(s1, s2))
+
+    def lookup(self, sbox, findall=False):
+        """
+        Name of an entry equivalent to @sbox (None if there is none),
+        or the list of all such names if @findall.
+        """
+        if not isinstance(sbox, SBox2):
+            sbox = SBox2(sbox)
+        res = []
+        for name, other in self.candidates(sbox):
+            if (
+                other.input_size() != sbox.input_size()
+                or other.output_size() != sbox.output_size()
+            ):
+                continue
+            if not self.representatives and not self.is_equivalent(sbox, other):
+                continue
+            if not findall:
+                return name
+            res.append(name)
+        return res if findall else None
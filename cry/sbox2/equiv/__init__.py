@@ -1,32 +1,61 @@
-from itertools import product
-
 from binteger import Bin
 
 from cry.sagestuff import BooleanPolynomialRing, Integer, matrix, GF, LinearCode
 from cry.sagestuff import BooleanFunction
 
+from cry.py.utils.cache import cached_method
+
 from .linear import LEContext
 from .linear_generic import LEContext as LEContextGeneric
+from .representative import linear_representative, affine_representative
+from .parallel import affine_equivalences
+from .xor import xor_equivalence, xor_fingerprint
 
 
 class Equiv(object):
+    @cached_method
+    def invariants(self, equiv="affine"):
+        """
+        Fingerprint of cheap invariants, equal for S-boxes equivalent
+        under @equiv ("xor", "linear", "affine" or "ccz"):
+        - xor: the value distributions of the derivatives in directions
+          1, 2, ..., 2^(n-1) (linear time, see equiv.xor);
+        - ccz: DDT and absolute LAT value distributions;
+        - affine: also the preimage structure, the degree and minimum
+          component degree (at least 1) and the number of linear
+          structures;
+        - linear: also whether 0 maps to 0.
+        """
+        assert equiv in ("xor", "linear", "affine", "ccz")
+        if equiv == "xor":
+            return xor_fingerprint(self._S, self.n)
+        res = (
+            tuple(sorted(self.DDT_distrib().items())),
+            tuple(sorted(self.LAT_distrib().items())),
+        )
+        if equiv == "ccz":
+            return res
+        res += (
+            tuple(sorted(self.preimage_structure().items())),
+            max(self.degree(), 1),
+            max(self.min_degree(), 1),
+            len(self.linear_structures()),
+        )
+        if equiv == "affine":
+            return res
+        return res + (self[0] == 0,)
+
     @staticmethod
     def are_XOR_equivalent(s1, s2):
         """
         If yes, return (cx, cy) such that
             s1[x] = cy + s2[x + cx]
         (+ is xor)
+        Candidates for cx are narrowed by derivatives (see equiv.xor).
         """
         s1, s2 = convert_sboxes(s1, s2)
         assert_equal_sizes(s1, s2)
-        n = s1.n
-        for cx in range(2**n):
-            cy = s1[0] ^ s2[0 ^ cx]
-            for x in range(1, 2**n):
-                if s1[x] ^ s2[x ^ cx] != cy:
-                    break
-            else:
-                return (cx, cy)
+        return xor_equivalence(s1._S, s2._S, s1.n)
 
     def is_XOR_equivalent(self, other):
         return Equiv.are_XOR_equivalent(self, other)
@@ -52,6 +81,18 @@ class Equiv(object):
         assert_equal_sizes(s1, s2)
         # currently
         # assert_permutations(s1, s2)
+        if s1.invariants("linear") != s2.invariants("linear"):
+            return [] if findall else False
+        return Equiv._linear_equivalence(s1, s2, findall=findall)
+
+    @staticmethod
+    def _linear_equivalence(s1, s2, findall=False):
+        """
+        are_linear_equivalent without the invariants check, for callers
+        that already filtered by invariants (e.g. the affine shift search).
+        """
+        if (s1[0] == 0) != (s2[0] == 0):
+            return [] if findall else False
 
         LEcls = LEContext if s1.is_permutation() and s2.is_permutation() else LEContextGeneric
         LEcls.sbox = Equiv.new
@@ -71,51 +112,124 @@ class Equiv(object):
             assert A.is_permutation()
             assert B.is_permutation()
             return A, B
-        return res
+        # the generic context reports no solution as False
+        return [] if findall else False
 
     def is_linear_equivalent(self, other, **kwargs):
         return self.are_linear_equivalent(self, other, **kwargs)
 
+    @cached_method
+    def _linear_representative(self):
+        R, A, B = linear_representative(self.list(), self.n, self.m)
+        return (
+            Equiv.new(R, m=self.m),
+            Equiv.new(A, m=self.n),
+            Equiv.new(B, m=self.m),
+        )
+
+    def linear_representative(self, transforms=False):
+        """
+        Lexicographically smallest R = B * self * A over linear
+        permutations A, B: equal for linear equivalent S-boxes.
+        With @transforms, return (R, A, B).
+        """
+        res = self._linear_representative()
+        return res if transforms else res[0]
+
+    @cached_method
+    def _affine_representative(self):
+        R, a, A, B = affine_representative(self.list(), self.n, self.m)
+        return (
+            Equiv.new(R, m=self.m),
+            a,
+            Equiv.new(A, m=self.n),
+            Equiv.new(B, m=self.m),
+        )
+
+    def affine_representative(self, transforms=False):
+        """
+        Lexicographically smallest affine equivalent of self:
+        equal for affine equivalent S-boxes, usable as a catalog key.
+        With @transforms, return (R, a, A, B) such that
+            R == B * self.xor(a, self[a]) * A
+        """
+        res = self._affine_representative()
+        return res if transforms else res[0]
+
     @staticmethod
-    def are_affine_equivalent(s1, s2, findall=False, counts_only=False):
+    def are_affine_equivalent(s1, s2, findall=False, counts_only=False,
+                              processes=1, representatives=False):
+        """
+        If yes, return (xa, A, B, xb) with linear A, B such that
+            (B * s1 * A).xor(xa, xb) == s2
+        found by searching the shifts until the first hit, on a process
+        pool with @processes != 1 (None = all cores).
+        With @representatives, compare the affine representatives
+        instead. They are cached, so this pays off when one S-box is
+        compared many times, but a single representative may take a
+        minute for a random 8-bit permutation, while the shift search
+        usually stops early and parallelizes; hence it is the default.
+        With @findall, return {(a, b): [(A, B), ...]} (or counts) over
+        all shifts s1.xor(a, b) linear equivalent to s2,
+        see affine_equivalences.
+        """
         s1, s2 = convert_sboxes(s1, s2)
         assert_equal_sizes(s1, s2)
-        # currently
-        # assert_permutations(s1, s2)
+        if s1.invariants("affine") != s2.invariants("affine"):
+            return {} if findall else False
 
-        full_res = {}
+        if representatives and not findall:
+            R1, a1, A1, B1 = s1.affine_representative(transforms=True)
+            R2, a2, A2, B2 = s2.affine_representative(transforms=True)
+            if R1 != R2:
+                return False
+            # B1 * s1' * A1 == B2 * s2' * A2 for the shifts s' = s.xor(a, s[a])
+            A = A1 * ~A2
+            B = ~B2 * B1
+            xa = a2 ^ (~A)[a1]
+            xb = B[s1[a1]] ^ s2[a2]
+            assert A.is_linear() and B.is_linear()
+            assert A.is_permutation() and B.is_permutation()
+            assert (B * s1 * A).xor(xa, xb) == s2
+            return xa, A, B, xb
+
+        if findall and counts_only:
+            # workers only send counts back
+            return dict(Equiv.affine_equivalences(
+                s1, s2, findall=True, processes=processes, counts_only=True
+            ))
 
-        # temporary unoptimal algorithm
-        for a, b in product(range(s1.input_range()), range(s1.output_range())):
-            xor_s1 = Equiv.new(s1[x ^ a] ^ b for x in range(s1.input_range()))
-            lin_res = xor_s1.is_linear_equivalent(s2, findall=findall)
-            if findall and lin_res:
-                for A, B in lin_res:
-                    assert A.is_permutation()
-                    assert B.is_permutation()
-                    assert (B * xor_s1 * A) == s2
-                    assert (B * s1.xor(a, b) * A) == s2
-                    xa = A.preimage(a)
-                    xb = B[b]
-                    assert (B * s1 * A).xor(xa, xb) == s2
-                if counts_only:
-                    full_res.setdefault((a, b), 0)
-                    full_res[a, b] += len(lin_res)
-                else:
-                    full_res.setdefault((a, b), [])
-                    full_res[a, b] += lin_res
-            elif lin_res:
-                A, B = lin_res
+        full_res = {}
+        for (a, b), lin_res in Equiv.affine_equivalences(
+                s1, s2, findall=findall, processes=processes):
+            for A, B in lin_res:
                 assert A.is_permutation()
                 assert B.is_permutation()
-                assert (B * xor_s1 * A) == s2
                 assert (B * s1.xor(a, b) * A) == s2
                 xa = A.preimage(a)
                 xb = B[b]
                 assert (B * s1 * A).xor(xa, xb) == s2
-                return xa, A, B, xb
+                if not findall:
+                    return xa, A, B, xb
+            full_res[a, b] = lin_res
         return full_res if findall else False
 
+    @staticmethod
+    def affine_equivalences(s1, s2, findall=True, processes=None,
+                            chunksize=16, counts_only=False):
+        """
+        Stream ((a, b), [(A, B), ...]) with B * s1.xor(a, b) * A == s2
+        (or ((a, b), count) with @counts_only) as found by @processes
+        workers (None = all cores, 1 = serial) on tasks of @chunksize
+        shifts, stopping at the first one unless @findall.
+        """
+        s1, s2 = convert_sboxes(s1, s2)
+        assert_equal_sizes(s1, s2)
+        return affine_equivalences(
+            s1, s2, findall=findall, processes=processes, chunksize=chunksize,
+            counts_only=counts_only,
+        )
+
     def is_affine_equivalent(self, other, **kwargs):
         return self.are_affine_equivalent(self, other, **kwargs)
 
@@ -123,6 +237,8 @@ class Equiv(object):
     def are_CCZ_equivalent(s1, s2):
         s1, s2 = convert_sboxes(s1, s2)
         assert_equal_sizes(s1, s2)
+        if s1.invariants("ccz") != s2.invariants("ccz"):
+            return False
         lin1 = s1.is_linear()
         lin2 = s2.is_linear()
         if lin1 ^ lin2:
@@ -1,15 +1,25 @@
-try:
-    from Queue import Queue
-except:
-    from queue import Queue
+from collections import deque
+
+
+UNKNOWN = -1
 
 
 class LEContext(object):
+    """
+    Linear equivalence of permutations s1, s2: find linear A, B with
+        B * s1 * A == s2
+    by guessing values of A and propagating through
+        A(x) = y  =>  B(s1(y)) = s2(x)
+        B(x) = y  =>  A(s2^-1(y)) = s1^-1(x)
+    and linearity (see Equiv.are_linear_equivalent).
+    """
+    sbox = None  # S-box class used for results, set by Equiv
+
     def __init__(self, s1, s2, findall=False):
-        self.s1 = tuple(s1)
-        self.s2 = tuple(s2)
-        self.s1inv = tuple(s1.inverse())
-        self.s2inv = tuple(s2.inverse())
+        self.s1 = s1.list()
+        self.s2 = s2.list()
+        self.s1inv = (~s1).list()
+        self.s2inv = (~s2).list()
 
         self.ret = []
         self.findall = findall
@@ -32,45 +42,63 @@ class LEContext(object):
         assert len(self.ret) <= 1
         return self.ret[0] if self.ret else False
 
-    def input_range(self, no_zero=False):
-        if no_zero:
-            return range(1, len(self.s1))
-        else:
-            return range(len(self.s1))
-
 
 class LEState(object):
+    """
+    Partial maps A (side 0) and B (side 1) as fixed-size lists with
+    UNKNOWN entries, the lists of known and unknown inputs (the latter
+    with positions, for O(1) removal), and bitmaps of used outputs.
+    Guesses are undone by unwinding the trail of assignments instead of
+    copying the state.
+    """
     SIDE_A = 0
     SIDE_B = 1
 
-    def __init__(self, ctx, linear_maps=None, unknown_inputs=None, unknown_outputs=None):
+    def __init__(self, ctx):
         self.ctx = ctx
-
-        self.linear_maps = linear_maps or [{0: 0}, {0: 0}]
-        self.unknown_inputs = unknown_inputs or [set(self.ctx.input_range(no_zero=True)) for i in range(2)]
-        self.unknown_outputs = unknown_outputs or [set(self.ctx.input_range(no_zero=True)) for i in range(2)]
-
-        self.queue = Queue()
-        self.depth = 0
-
-    def copy(self):
-        lm2 = [self.linear_maps[i].copy() for i in range(2)]
-        ui2 = [self.unknown_inputs[i].copy() for i in range(2)]
-        uo2 = [self.unknown_outputs[i].copy() for i in range(2)]
-        st = LEState(self.ctx, lm2, ui2, uo2)
-        st.depth = self.depth + 1
-        return st
+        size = len(ctx.s1)
+        self.size = size
+        self.maps = [[UNKNOWN] * size for _ in range(2)]
+        self.known = [[], []]
+        self.unknown = [list(range(size)) for _ in range(2)]
+        self.pos = [list(range(size)) for _ in range(2)]
+        self.used = [bytearray(size), bytearray(size)]
+        self.trail = []
+        self.queue = deque()
+        for side in range(2):
+            self.assign(side, 0, 0)
+
+    def assign(self, side, inp, out):
+        self.maps[side][inp] = out
+        self.known[side].append(inp)
+        self.used[side][out] = 1
+        self.trail.append((side, inp))
+
+        unknown = self.unknown[side]
+        pos = self.pos[side]
+        last = unknown.pop()
+        if last != inp:
+            unknown[pos[inp]] = last
+            pos[last] = pos[inp]
+
+    def undo(self, mark):
+        while len(self.trail) > mark:
+            side, inp = self.trail.pop()
+            self.known[side].pop()
+            self.used[side][self.maps[side][inp]] = 0
+            self.maps[side][inp] = UNKNOWN
+            self.pos[side][inp] = len(self.unknown[side])
+            self.unknown[side].append(inp)
 
     def learn(self, side, inp, out, queue=True):
-        if inp in self.linear_maps[side]:
-            return self.linear_maps[side][inp] == out
-        elif out not in self.unknown_outputs[side]:
+        cur = self.maps[side][inp]
+        if cur != UNKNOWN:
+            return cur == out
+        elif self.used[side][out]:
             return False
-        self.linear_maps[side][inp] = out
-        self.unknown_inputs[side].remove(inp)
-        self.unknown_outputs[side].remove(out)
+        self.assign(side, inp, out)
         if queue:
-            self.queue.put((side, inp))
+            self.queue.append((side, inp))
         return True
 
     def dual(self, side, inp, out):
@@ -83,29 +111,25 @@ class LEState(object):
         return dual_inp, dual_out
 
     def expand_horizontal(self, side, inp, out):
-        if len(self.linear_maps[side]) < len(self.ctx.s1) / 2:
-            for old_inp, old_out in list(self.linear_maps[side].items()):
-                new_inp = inp ^ old_inp
-                new_out = out ^ old_out
-                yield new_inp, new_out
+        lin = self.maps[side]
+        known = self.known[side]
+        if len(known) < self.size // 2:
+            for old_inp in known[:]:
+                yield inp ^ old_inp, out ^ lin[old_inp]
         else:
-            for unk_inp in self.unknown_inputs[side].copy():
-                old_inp = inp ^ unk_inp
-                if old_inp in self.linear_maps[side]:
-                    old_out = self.linear_maps[side][old_inp]
-                    new_inp = inp ^ old_inp # unk_inp
-                    new_out = out ^ old_out
-                    yield new_inp, new_out
-
-    def check(self):
-        while self.queue.qsize() > 0:
-            side, inp = self.queue.get()
+            for unk_inp in self.unknown[side][:]:
+                old_out = lin[inp ^ unk_inp]
+                if old_out != UNKNOWN:
+                    yield unk_inp, out ^ old_out
 
-            learn_inp = inp
-            learn_out = self.linear_maps[side][inp]
+    def propagate(self):
+        queue = self.queue
+        while queue:
+            side, inp = queue.popleft()
+            out = self.maps[side][inp]
 
             # learn horizontally (same side)
-            for new_inp, new_out in self.expand_horizontal(side, learn_inp, learn_out):
+            for new_inp, new_out in self.expand_horizontal(side, inp, out):
                 if not self.learn(side, new_inp, new_out, queue=False):
                     return False
 
@@ -113,27 +137,36 @@ class LEState(object):
                 new_inp2, new_out2 = self.dual(side, new_inp, new_out)
                 if not self.learn(side ^ 1, new_inp2, new_out2, queue=True):
                     return False
+        return True
+
+    def check(self):
+        if not self.propagate():
+            self.queue.clear()
+            return False
 
-        if len(self.linear_maps[0]) == len(self.linear_maps[1]) == len(self.ctx.s1):
+        if len(self.known[0]) == len(self.known[1]) == self.size:
             return self.result_ready()
 
         # queues are empty
         # need to guess
-        inp = min(self.unknown_inputs[0])
-        for out in self.unknown_outputs[0]:
-            sub = self.copy()
-            sub.learn(0, inp, out)
-            res = sub.check()
+        inp = self.maps[0].index(UNKNOWN)
+        used = self.used[0]
+        for out in range(1, self.size):
+            if used[out]:
+                continue
+            mark = len(self.trail)
+            self.learn(0, inp, out)
+            res = self.check()
+            self.undo(mark)
             if res and not self.ctx.findall:
                 return res
         return False
 
     def result_ready(self):
-        elems = self.ctx.input_range()
-        A = self.ctx.sbox(self.linear_maps[0][x] for x in elems)
+        A = self.ctx.sbox(self.maps[0])
         if not A.is_linear():
             return False
-        B = self.ctx.sbox(self.linear_maps[1][x] for x in elems)
+        B = self.ctx.sbox(self.maps[1])
         if not B.is_linear():
             return False
 
@@ -0,0 +1,118 @@
+"""
+Affine equivalence search over the shifts (a, b) across a process pool:
+each task runs the linear equivalence search of s1.xor(a, b) against s2
+for a chunk of shifts. Results are streamed back as tasks complete; a
+search for a single solution drops the pending tasks at the first hit
+and does not wait for the running ones, which are short.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_worker_sboxes = None
+
+
+def _set_sboxes(cls, s1, s2, m):
+    global _worker_sboxes
+    _worker_sboxes = cls(s1, m=m), cls(s2, m=m)
+
+
+def candidate_shifts(s1, s2):
+    """
+    Shifts (a, b) worth searching: linear maps fix 0, so s1.xor(a, b)
+    must map 0 to 0 exactly when s2 does. Shifts are not fingerprinted
+    further, the affine invariants of s1 and s2 are compared once by
+    the caller.
+    """
+    zero = s2[0] == 0
+    return [
+        (a, b)
+        for a in s1.input_range()
+        for b in s1.output_range()
+        if (s1[a] == b) == zero
+    ]
+
+
+def search_shifts(s1, s2, shifts, findall=True, counts_only=False):
+    """
+    [((a, b), [(A, B), ...]), ...] for the @shifts (a, b) such that
+    B * s1.xor(a, b) * A == s2 for linear permutations A, B,
+    with the first one only unless @findall.
+    With @counts_only, ((a, b), number of (A, B)) pairs instead.
+    """
+    res = []
+    for a, b in shifts:
+        lin_res = s1._linear_equivalence(s1.xor(a, b), s2, findall=findall)
+        if not lin_res:
+            continue
+        if not findall:
+            lin_res = [lin_res]
+        res.append(((a, b), len(lin_res) if counts_only else lin_res))
+        if not findall:
+            break
+    return res
+
+
+def _search_shifts(args):
+    shifts, findall, counts_only = args
+    s1, s2 = _worker_sboxes
+    res = search_shifts(s1, s2, shifts, findall=findall, counts_only=counts_only)
+    if counts_only:
+        return res
+    # tables travel back as lists
+    return [
+        (ab, [(A.list(), B.list()) for A, B in lin_res])
+        for ab, lin_res in res
+    ]
+
+
+def affine_equivalences(s1, s2, findall=True, processes=None, chunksize=16,
+                        counts_only=False):
+    """
+    Yield ((a, b), [(A, B), ...]) for all shifts with
+        B * s1.xor(a, b) * A == s2
+    in completion order, or only the first one found unless @findall.
+    With @counts_only, yield ((a, b), number of (A, B)) instead, and
+    workers do not send the tables back.
+    @processes workers (None = all cores, 1 = in this process), each
+    task searching @chunksize shifts.
+    """
+    todo = candidate_shifts(s1, s2)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1:
+        for ab in todo:
+            for ab, lin_res in search_shifts(
+                    s1, s2, [ab], findall=findall, counts_only=counts_only):
+                yield ab, lin_res
+                if not findall:
+                    return
+        return
+
+    cls = type(s1)
+    pool = ProcessPoolExecutor(
+        processes,
+        initializer=_set_sboxes,
+        initargs=(cls, s1.list(), s2.list(), s1.output_size()),
+    )
+    try:
+        futures = [
+            pool.submit(
+                _search_shifts, (todo[i:i+chunksize], findall, counts_only)
+            )
+            for i in range(0, len(todo), chunksize)
+        ]
+        for future in as_completed(futures):
+            for ab, lin_res in future.result():
+                if counts_only:
+                    yield ab, lin_res
+                    if not findall:
+                        return
+                    continue
+                yield ab, [
+                    (cls(A, m=s1.input_size()), cls(B, m=s1.output_size()))
+                    for A, B in lin_res
+                ]
+                if not findall:
+                    return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
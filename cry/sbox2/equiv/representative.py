@@ -0,0 +1,435 @@
+"""
+Canonical representatives of linear and affine equivalence classes.
+
+The linear representative of S is the lexicographically smallest
+    R = B * S * A
+over linear permutations A, B (a variant of the representative algorithm
+of Biryukov et al., EUROCRYPT 2003). A is chosen on basis points 2^j
+(everything else follows by linearity) and B is built greedily: an output
+outside the span of outputs seen so far is mapped to the smallest value
+outside the span of the images, which always extends them to 0..2^k-1.
+Candidates for A(2^j) are compared on the block R[2^j:2^(j+1)] and only
+those giving the smallest block are kept, so the search only branches on
+ties.
+
+Ties multiply with the self-equivalences of S (up to |GL(n)| states for
+linear S). Two tied states (A, B) and (A', B') have the same future if
+A' = U * A and B' = B * V^-1 on their domains for a self-equivalence
+V * S = S * U, so only one state per such orbit is kept. Orbits are
+tested by a guess-and-propagate search for U (V follows from V(S(x)) =
+S(U(x))), after cheap necessary checks: first and second order
+derivative profiles of the points involved, and the blocks over all
+candidates of the next level, must agree. The search is capped and both
+states are kept when it gives up. Once a level is not at least halved
+this way, the ties are not due to self-equivalences and the remaining
+levels are not collapsed.
+Linear S skip the search: R(x) = x >> dim ker S.
+
+Since an affine class contains S(x ^ a) ^ S(a) for every a, and its
+smallest element maps 0 to 0, the affine representative is the smallest
+linear representative over these 2^n shifts.
+
+>>> linear_representative([1, 0, 3, 2], 2, 2)[0]
+[1, 0, 2, 3]
+>>> affine_representative([1, 0, 3, 2], 2, 2)[0]
+[0, 1, 2, 3]
+"""
+
+import numpy as np
+
+from ..algorithms.ddt import ddt
+
+UNKNOWN = -1
+# tied states compared with each state by the self-equivalence search
+MAX_COMPARISONS = 4
+
+
+def is_linear_table(S):
+    """S[x] == S[x ^ low] ^ S[low] for the lowest set bit low of each x."""
+    if S[0] != 0:
+        return False
+    for x in range(1, len(S)):
+        low = x & -x
+        if S[x] != S[x ^ low] ^ S[low]:
+            return False
+    return True
+
+
+def extend(B, dom, y):
+    """Map a new output @y to the next image 2^k and extend B linearly."""
+    img = len(dom)
+    for i in range(len(dom)):
+        d = dom[i]
+        B[d ^ y] = B[d] ^ img
+        dom.append(d ^ y)
+
+
+def undo_extend(B, dom, size):
+    while len(dom) > size:
+        B[dom.pop()] = UNKNOWN
+
+
+def complete(B, dom, m):
+    """Extend the partial linear map B to a permutation of 2^m values."""
+    for y in range(1 << m):
+        if B[y] == UNKNOWN:
+            extend(B, dom, y)
+    return B
+
+
+def linear_map_representative(S, n, m):
+    """(R, A, B) as in linear_representative, for a linear @S."""
+    pivots = {}
+    kernel = []
+    images = []
+    for i in range(n):
+        x, y = 1 << i, S[1 << i]
+        while y and y.bit_length() - 1 in pivots:
+            px, py = pivots[y.bit_length() - 1]
+            x ^= px
+            y ^= py
+        if y:
+            pivots[y.bit_length() - 1] = x, y
+            images.append((x, y))
+        else:
+            kernel.append(x)
+
+    A = [0]
+    for a in kernel + [x for x, _ in images]:
+        A += [x ^ a for x in A]
+    B = [UNKNOWN] * (1 << m)
+    B[0] = 0
+    dom = [0]
+    for _, y in images:
+        extend(B, dom, y)
+    R = [x >> len(kernel) for x in range(1 << n)]
+    return R, A, complete(B, dom, m)
+
+
+def derivative_profiles(S, m):
+    """
+    Hashes of the sorted DDT row of each c and of the sorted numbers of
+    zeros of the second derivatives D_c D_c2 S over c2. A
+    self-equivalence S * U == V * S maps those of c to those of U(c),
+    and they are the same for S(x ^ a) ^ S(a) for all a.
+    """
+    S = np.asarray(S, dtype=np.int64)
+    xs = np.arange(len(S))
+    T = ddt(S, m)
+    T.sort(axis=1)
+    res = []
+    for c in range(len(S)):
+        zeros = np.sort(ddt(S ^ S[xs ^ c], m)[:, 0])
+        res.append(hash((T[c].tobytes(), zeros.tobytes())))
+    return res
+
+
+def state_signature(S, n, A, B, dom, profiles, full=False):
+    """
+    Hash of the sorted blocks B * S(A[t] ^ c), with the profile of c,
+    over the candidates c of the next level: the same for states in one
+    orbit. Outputs not in the domain of B are UNKNOWN, or with @full
+    extend B as in the search (slower, but separates more states).
+    """
+    image = set(A)
+    size = len(dom)
+    res = []
+    for c in range(1, 1 << n):
+        if c in image:
+            continue
+        if not full:
+            res.append((tuple(B[S[a ^ c]] for a in A), profiles[c]))
+            continue
+        block = []
+        for a in A:
+            y = S[a ^ c]
+            if B[y] == UNKNOWN:
+                extend(B, dom, y)
+            block.append(B[y])
+        undo_extend(B, dom, size)
+        res.append((tuple(block), profiles[c]))
+    res.sort()
+    return hash(tuple(res))
+
+
+class PartialLinear(object):
+    """Injective linear map known on a subspace, with undo by size."""
+    def __init__(self, size):
+        self.map = [UNKNOWN] * size
+        self.map[0] = 0
+        self.used = bytearray(size)
+        self.used[0] = 1
+        self.dom = [0]
+
+    def add(self, x, y):
+        """Learn x -> y and its linear closure; False on a conflict."""
+        cur = self.map[x]
+        if cur != UNKNOWN:
+            return cur == y
+        if self.used[y]:
+            return False
+        for i in range(len(self.dom)):
+            d = self.dom[i]
+            self.map[d ^ x] = self.map[d] ^ y
+            self.used[self.map[d] ^ y] = 1
+            self.dom.append(d ^ x)
+        return True
+
+    def undo(self, size):
+        while len(self.dom) > size:
+            x = self.dom.pop()
+            self.used[self.map[x]] = 0
+            self.map[x] = UNKNOWN
+
+
+class SelfEquivalences(object):
+    """
+    Tests whether partial maps extend to linear permutations U, V with
+    S * U == V * S, by propagating
+        V(S(x)) = S(U(x)),  U(S^-1(y)) = S^-1(V(y))
+    and guessing U(x) among the points with the profile of x (see
+    derivative_profiles), where the preimage constraint leaves the
+    fewest candidates.
+    """
+    def __init__(self, S, n, m, profiles):
+        self.S = S
+        self.n = n
+        self.m = m
+        self.profiles = profiles
+        self.pre = [[] for _ in range(1 << m)]
+        for x, y in enumerate(S):
+            self.pre[y].append(x)
+        self.groups = {}
+        for x, prof in enumerate(profiles):
+            self.groups.setdefault(prof, []).append(x)
+
+    def extends(self, known_U, known_V, budget=None):
+        """
+        Whether the (input, output) pairs extend to U, V; gives up
+        (False) after @budget guesses (default 2^n).
+        """
+        S, pre, profiles = self.S, self.pre, self.profiles
+        guesses = [(1 << self.n) if budget is None else budget]
+        U = PartialLinear(1 << self.n)
+        V = PartialLinear(1 << self.m)
+        done = [1, 1]
+
+        def propagate():
+            while done[0] < len(U.dom) or done[1] < len(V.dom):
+                while done[0] < len(U.dom):
+                    x = U.dom[done[0]]
+                    done[0] += 1
+                    if profiles[x] != profiles[U.map[x]]:
+                        return False
+                    if not V.add(S[x], S[U.map[x]]):
+                        return False
+                while done[1] < len(V.dom):
+                    y = V.dom[done[1]]
+                    done[1] += 1
+                    xs, xs2 = pre[y], pre[V.map[y]]
+                    if len(xs) != len(xs2):
+                        return False
+                    if len(xs) == 1 and not U.add(xs[0], xs2[0]):
+                        return False
+            return True
+
+        def guess():
+            best = None
+            for x in range(1 << self.n):
+                if U.map[x] != UNKNOWN:
+                    continue
+                y = V.map[S[x]]
+                cands = self.groups[profiles[x]] if y == UNKNOWN else pre[y]
+                if best is None or len(cands) < len(best[1]):
+                    best = x, cands
+            return best
+
+        def search():
+            if len(U.dom) == 1 << self.n:
+                return True
+            x, cands = guess()
+            sizes = len(U.dom), len(V.dom)
+            for y in cands:
+                if U.used[y]:
+                    continue
+                guesses[0] -= 1
+                if guesses[0] < 0:
+                    return False
+                U.add(x, y)
+                if propagate() and search():
+                    return True
+                U.undo(sizes[0])
+                V.undo(sizes[1])
+                done[:] = sizes
+            return False
+
+        if not all(U.add(x, y) for x, y in known_U):
+            return False
+        if not all(V.add(x, y) for x, y in known_V):
+            return False
+        return propagate() and search()
+
+    def same_future(self, state1, state2):
+        """Whether @state2 is the image of @state1 by a self-equivalence."""
+        A1, _, dom1 = state1
+        A2, _, dom2 = state2
+        if len(dom1) != len(dom2):
+            return False
+        known_U = [(A1[h], A2[h]) for h in bit_range(len(A1))]
+        # dom[r] is the preimage of r under B
+        known_V = [(dom1[r], dom2[r]) for r in bit_range(len(dom1))]
+        return self.extends(known_U, known_V)
+
+
+def bit_range(size):
+    h = 1
+    while h < size:
+        yield h
+        h <<= 1
+
+
+def refine(states, key):
+    """Split groups of states by @key, keeping singletons as they are."""
+    groups = {}
+    for state in states:
+        groups.setdefault(key(state), []).append(state)
+    return list(groups.values())
+
+
+def collapse(selfeq, states):
+    """
+    Keep one of the tied states per self-equivalence orbit. States are
+    split by the profiles of A, then by state_signature, then by the full
+    state_signature, and only states left together are searched, each
+    against the first MAX_COMPARISONS kept states of its group.
+    """
+    S, n, profiles = selfeq.S, selfeq.n, selfeq.profiles
+    keys = [
+        lambda state: tuple(profiles[a] for a in state[0]),
+        lambda state: state_signature(S, n, *state, profiles),
+        lambda state: state_signature(S, n, *state, profiles, full=True),
+    ]
+    groups = [states]
+    for key in keys:
+        groups = [
+            sub
+            for group in groups
+            for sub in (refine(group, key) if len(group) > 1 else [group])
+        ]
+
+    res = []
+    for group in groups:
+        reps = []
+        for state in group:
+            if not any(
+                selfeq.same_future(rep, state)
+                for rep in reps[:MAX_COMPARISONS]
+            ):
+                reps.append(state)
+        res += reps
+    return res
+
+
+def linear_representative(S, n, m, bound=None, profiles=None):
+    """
+    (R, A, B) with R = B * S * A lexicographically smallest
+    over linear permutations A, B, all given as lists.
+
+    With @bound (a list), returns None as soon as R is known to be
+    greater than @bound. @profiles (see derivative_profiles) are
+    computed when first needed unless given.
+    """
+    if is_linear_table(S):
+        res = linear_map_representative(S, n, m)
+        if bound is not None and res[0] > list(bound):
+            return None
+        return res
+
+    B = [UNKNOWN] * (1 << m)
+    B[0] = 0
+    dom = [0]
+    if B[S[0]] == UNKNOWN:
+        extend(B, dom, S[0])
+    R = [B[S[0]]]
+    if bound is not None:
+        if R[0] > bound[0]:
+            return None
+        if R[0] < bound[0]:
+            bound = None
+
+    states = [([0], B, dom)]
+    selfeq = None
+    collapsing = True
+    for j in range(n):
+        h = 1 << j
+        best = None if bound is None else bound[h:2*h]
+        beaten = bound is None
+        keep = []
+        for A, B, dom in states:
+            image = set(A)
+            size = len(dom)
+            for c in range(1, 1 << n):
+                if c in image:
+                    continue
+                block = []
+                less = beaten and best is None
+                for t in range(h):
+                    y = S[A[t] ^ c]
+                    if B[y] == UNKNOWN:
+                        extend(B, dom, y)
+                    r = B[y]
+                    block.append(r)
+                    if not less:
+                        if r > best[t]:
+                            break
+                        less = r < best[t]
+                else:
+                    if less:
+                        best = block
+                        beaten = True
+                        keep = []
+                    keep.append((A + [a ^ c for a in A], B[:], dom[:]))
+                undo_extend(B, dom, size)
+        if not keep:
+            return None
+        if not beaten:
+            # tied with the bound so far
+            best = bound[h:2*h]
+        else:
+            bound = None
+        R += best
+        states = keep
+        if collapsing and len(states) > 1 and j < n - 1:
+            if selfeq is None:
+                if profiles is None:
+                    profiles = derivative_profiles(S, m)
+                selfeq = SelfEquivalences(S, n, m, profiles)
+            kept = collapse(selfeq, states)
+            # ties not explained by self-equivalences: stop paying for it
+            collapsing = 2 * len(kept) <= len(states)
+            states = kept
+
+    A, B, dom = states[0]
+    return R, A, complete(B, dom, m)
+
+
+def affine_representative(S, n, m):
+    """
+    (R, a, A, B) with R = B * S' * A lexicographically smallest
+    over shifts S'(x) = S(x ^ a) ^ S(a) and linear permutations A, B.
+    """
+    if is_linear_table([y ^ S[0] for y in S]):
+        R, A, B = linear_map_representative([y ^ S[0] for y in S], n, m)
+        return R, 0, A, B
+
+    profiles = derivative_profiles(S, m)
+    best = None
+    for a in range(1 << n):
+        shifted = [S[x ^ a] ^ S[a] for x in range(1 << n)]
+        res = linear_representative(
+            shifted, n, m, bound=None if best is None else best[0],
+            profiles=profiles,
+        )
+        if res is not None and (best is None or res[0] < best[0]):
+            best = res[0], a, res[1], res[2]
+    return best
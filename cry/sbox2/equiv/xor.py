@@ -0,0 +1,97 @@
+"""
+XOR equivalence S1(x) = S2(x ^ cx) ^ cy through derivatives.
+
+The derivatives D_d S(x) = S(x) ^ S(x ^ d) do not depend on cy and are
+only shifted by cx:
+    D_d S1(x) = D_d S2(x ^ cx).
+Hence cx is among the points x where D_d S2 takes the value D_d S1(0),
+for every d. Filtering by d = 1, 2, 4, ... leaves a handful of
+candidates after O(N) work, and each candidate is checked in O(N).
+When derivatives do not separate the candidates (up to N survive, e.g.
+for S-boxes close to linear ones), all shifts are checked at once by
+dyadic correlations of the output bits, in O(m N log N) through the
+Walsh-Hadamard transform:
+    sum_x (-1)^(S1_k(x) + S2_k(x ^ cx)) = +-N for each output bit k.
+The multisets of values of D_d S for these d fingerprint the class.
+
+>>> S1 = np.array([0, 1, 3, 6, 7, 4, 5, 2])
+>>> S2 = S1[np.arange(8) ^ 5] ^ 3
+>>> shift_candidates(S2, S1, 3).tolist()
+[5]
+>>> xor_equivalence(S2, S1, 3)
+(5, 3)
+>>> xor_fingerprint(S1, 3) == xor_fingerprint(S2, 3)
+True
+"""
+import numpy as np
+
+from cry.py.anf.mobius import walsh_inplace
+
+
+def derivative(S, d):
+    """D_d S as an array."""
+    return S ^ S[np.arange(len(S)) ^ d]
+
+
+def xor_fingerprint(S, n):
+    """Sorted (value, count) pairs of D_d S for d = 1, 2, ..., 2^(n-1)."""
+    res = []
+    for i in range(n):
+        values, counts = np.unique(derivative(S, 1 << i), return_counts=True)
+        res.append(tuple(zip(values.tolist(), counts.tolist())))
+    return tuple(res)
+
+
+def shift_candidates(S1, S2, n):
+    """Input shifts cx compatible with D_d S1(0) = D_d S2(cx), d = 2^i."""
+    cand = np.arange(len(S2))
+    for i in range(n):
+        if len(cand) <= 1:
+            break
+        d = 1 << i
+        cand = cand[(S2[cand] ^ S2[cand ^ d]) == (S1[0] ^ S1[d])]
+    return cand
+
+
+def correlation_dtype(size):
+    """
+    int64 if it holds the transforms in correlated_shifts for tables of
+    @size entries (up to 2 size^3, i.e. size <= 2^20), else Python ints.
+
+    >>> correlation_dtype(1 << 20), correlation_dtype(1 << 21)
+    (dtype('int64'), dtype('O'))
+    """
+    if 2 * size ** 3 < 2 ** 63:
+        return np.dtype(np.int64)
+    return np.dtype(object)
+
+
+def correlated_shifts(S1, S2, m):
+    """
+    Mask of the shifts cx such that each output bit of S1(x) equals
+    that of S2(x ^ cx) for all x, or differs for all x.
+    """
+    bits = np.arange(m)[:, None]
+    dtype = correlation_dtype(len(S1))
+    res = np.ones((m, len(S1)), dtype=dtype)
+    for S in (S1, S2):
+        signs = 1 - 2 * ((S >> bits) & 1)
+        walsh_inplace(signs, axis=1)
+        res *= signs.astype(dtype)
+    walsh_inplace(res, axis=1)
+    # N times the correlations
+    return (np.abs(res) == len(S1) ** 2).all(axis=0)
+
+
+def xor_equivalence(S1, S2, n):
+    """(cx, cy) with S1(x) = S2(x ^ cx) ^ cy for all x, or None."""
+    xs = np.arange(len(S1))
+    cand = shift_candidates(S1, S2, n)
+    m = int(max(S1.max(), S2.max(), 1)).bit_length()
+    if len(cand) > n * m:
+        cand = cand[correlated_shifts(S1, S2, m)[cand]]
+    for cx in cand.tolist():
+        cy = S1[0] ^ S2[cx]
+        if np.array_equal(S1, S2[xs ^ cx] ^ cy):
+            return cx, int(cy)
+    return None
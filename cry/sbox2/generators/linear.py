@@ -1,5 +1,7 @@
 from random import randint
 
+import numpy as np
+
 from cry.sagestuff import GF
 
 from cry.matrix import matrix_mult_int
@@ -16,9 +18,10 @@ register = SBox2.new.register
 
 @register
 def from_matrix(mat):
-    s = []
-    for x in range(2**mat.ncols()):
-        s.append(matrix_mult_int(mat, x))
+    # span of the images of 1, 2, 4, ..., doubling the table each time
+    s = np.zeros(1, dtype=np.int64)
+    for e in range(mat.ncols()):
+        s = np.concatenate((s, s ^ matrix_mult_int(mat, 1 << e)))
     return SBox2(s, m=mat.nrows())
 
 
@@ -30,7 +33,7 @@ def random_linear_permutation(n):
 @register
 def random_affine_permutation(n):
     xor = randint(0, 2**n-1)
-    return SBox2(y ^ xor for y in from_matrix(random_invertible_matrix(n)))
+    return random_linear_permutation(n) ^ xor
 
 
 @register
@@ -44,7 +47,7 @@ def random_linear(n, m=None):
 def random_affine(*args):
     lin = random_linear(*args)
     xor = randint(0, max(lin))
-    return SBox2(y ^ xor for y in lin)
+    return lin ^ xor
 
 
 @register
@@ -4,6 +4,7 @@ from ..sbox2 import SBox2
 class GeneratorRegistry(object):
     def register(self, func):
         setattr(self, func.__name__, func)
+        return func
 
 
 def initialize_registry():
@@ -1,10 +1,13 @@
 from random import randint, random, shuffle
 
+import numpy as np
+
 from cry.sagestuff import (
-    Integer, GF, PolynomialRing
+    Integer, GF
 )
 from cry.utils import ranges
 from cry.sbox2 import SBox2
+from cry.sbox2.algorithms.field import gf2n_of, cyclotomic_leaders
 
 from binteger import Bin
 
@@ -152,9 +155,37 @@ def random_minicipher(n, kn=None):
     return SBox2(s)
 
 
+def field_tables(n=None, field=None):
+    assert (n is not None) ^ (field is not None)
+    return gf2n_of(field or GF(2**n, name='a'))
+
+
 @register
 def power(e, n=None, field=None):
-    assert (n is not None) ^ (field is not None)
-    field = field or GF(2**n, name='a')
-    x = PolynomialRing(field, names='x').gen()
-    return SBox2(x**e)
+    F = field_tables(n, field)
+    return SBox2(F.pow(range(F.order), e), m=F.n)
+
+
+@register
+def polynomial(terms, n=None, field=None):
+    """
+    x -> sum c * x^e over GF(2^n) for integer pairs (e, c) in @terms
+    (a dict or a sequence), c given by its integer representation.
+    """
+    F = field_tables(n, field)
+    return SBox2(F.evaluate(terms), m=F.n)
+
+
+@register
+def power_maps(exponents=None, n=None, field=None):
+    """
+    Yield (e, x^e) for all @exponents, by default one per cyclotomic
+    class (up to linear equivalence, all power maps of GF(2^n)).
+    The field tables are shared, each map costs one table lookup per point.
+    """
+    F = field_tables(n, field)
+    if exponents is None:
+        exponents = cyclotomic_leaders(F.n)
+    xs = np.arange(F.order)
+    for e in exponents:
+        yield e, SBox2(F.pow(xs, e), m=F.n)
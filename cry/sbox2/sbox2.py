@@ -1,6 +1,9 @@
+import hashlib
 from random import randint
 from collections import defaultdict, Counter
 
+import numpy as np
+
 from binteger import Bin
 
 from cry.sagestuff import (
@@ -8,26 +11,52 @@ from cry.sagestuff import (
     PolynomialRing,
     BooleanFunction, BooleanPolynomialRing,
 )
-from cry.matrix import mat_distribution
 
 from sage.crypto.sbox import SBox as Sage_SBox
 from sage.rings.polynomial.polynomial_element import is_Polynomial
 from sage.structure.element import is_Vector
 
-from cry.py.anf import mobius
+from cry.py.anf.mobius import mobius_inplace, mobius_packed
+from cry.py.utils.cache import cached_method, is_cached
+
+from .algorithms.anf import write_anf_masks
+from .algorithms.bits import bitslice, unslice, int_weight
+from .algorithms.field import gf2n_of
+from .algorithms.degree import (
+    degrees as anf_degrees, min_degree as anf_min_degree,
+)
+from .algorithms.ddt import (
+    ddt as ddt_table, ddt_distrib, differential_uniformity,
+)
+from .algorithms.lat import lat as lat_table, table_distrib, linearity
+from .tables import Tables
+from .equiv import Equiv
 
 
-class SBox2:
+class SBox2(Tables, Equiv):
     """
     Attrs:
         n (int): input bits
         m (int): output bits
+
+    The lookup table is stored as a read-only numpy array of the smallest
+    unsigned type holding m bits (see table_dtype), possibly memory-mapped
+    from a file (see load/save).
+
+    Derived tables and properties are computed on first access and kept
+    in a per-instance cache of at most CACHE_LIMIT bytes (None = unbounded),
+    see clear_cache().
+    DDT, LAT and ANF tables are also kept on disk, keyed by digest(),
+    if STORE is set to a cry.utils.cache.TableStore.
     """
     GENERATORS_ATTRIBUTE = "new"
     ALGORITHMS_ATTRIBUTE = "alg"
     new = None  # will be set outside
     alg = None
 
+    CACHE_LIMIT = 256 * 2**20
+    STORE = None
+
     def __init__(self, spec, m=None):
         if is_Polynomial(spec):
             poly = spec
@@ -36,26 +65,88 @@ class SBox2:
             fld = poly.base_ring()
             if m is None:
                 m = ZZ(fld.order()-1).nbits()
-            spec = [
-                poly.subs(fld.fetch_int(x)).integer_representation()
-                for x in range(len(fld))
-            ]
-
-        self._S = tuple(map(int, spec))
-        self.n = ZZ(len(self._S)-1).nbits()
-        self.m = ZZ(max(self._S)).nbits()
+            if fld.characteristic() == 2:
+                spec = gf2n_of(fld).evaluate({
+                    e: c.integer_representation()
+                    for e, c in poly.dict().items()
+                })
+            else:
+                spec = [
+                    poly.subs(fld.fetch_int(x)).integer_representation()
+                    for x in range(len(fld))
+                ]
+
+        table = as_table_array(spec, m)
+        assert table.ndim == 1
+        assert int(table.min()) >= 0
+        top = int(table.max())
         if m is not None:
             m = int(m)
-            lim = 1 << self.m
-            assert all(0 <= y < lim for y in self._S)
+            assert top >> m == 0
         else:
-            m = ZZ(max(self._S)).nbits()
+            m = top.bit_length()
+        dtype = table_dtype(m)
+        if table.dtype == dtype and (
+            table is not spec or isinstance(table, np.memmap)
+        ):
+            # fresh, shared with a (read-only) SBox2 or file-mapped:
+            # no copy needed
+            table = table.view()
+        else:
+            table = np.array(table, dtype=dtype)
+        table.flags.writeable = False
+
+        self._S = table
+        self.n = (len(table) - 1).bit_length()
         self.m = m
         assert self.input_size() >= 1
         assert self.output_size() >= 0
 
+    @classmethod
+    def _from_array(cls, table, m):
+        """
+        Trusted constructor, skipping validation and copying:
+        @table must be a fresh array of table_dtype(@m) with values < 2^m.
+        """
+        self = cls.__new__(cls)
+        table.flags.writeable = False
+        self._S = table
+        self.n = (len(table) - 1).bit_length()
+        self.m = m
+        return self
+
+    @classmethod
+    def load(cls, filename, m=None, mmap=True):
+        """
+        Load a table saved by save(), memory-mapped by default:
+        only the pages actually used are read from disk.
+        """
+        return cls(np.load(filename, mmap_mode="r" if mmap else None), m=m)
+
+    def save(self, filename):
+        """Save the table as a .npy file (see load)."""
+        with open(filename, "wb") as f:
+            np.save(f, self._S)
+
+    @property
+    def nbytes(self):
+        return self._S.nbytes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_cache", None)
+        return state
+
+    def clear_cache(self):
+        self.__dict__.pop("_cache", None)
+
+    def cache_size(self):
+        """Bytes used by cached tables and properties."""
+        cache = self.__dict__.get("_cache")
+        return cache.size if cache is not None else 0
+
     def to_sage(self):
-        return Sage_SBox(self._S)
+        return Sage_SBox(self.list())
 
     def input_size(self):
         return self.n
@@ -67,10 +158,10 @@ class SBox2:
         return (1 << self.n)
 
     def tuple(self):
-        return self._S
+        return tuple(self._S.tolist())
 
     def list(self):
-        return list(self._S)
+        return self._S.tolist()
 
     def input_range(self):
         return range(1 << self.input_size())
@@ -81,7 +172,7 @@ class SBox2:
     codomain = output_range
 
     def image(self):
-        return set(self)
+        return set(np.unique(self._S).tolist())
 
     def graph(self):
         return enumerate(self)
@@ -91,27 +182,64 @@ class SBox2:
         if isinstance(other, type(self)):
             return (
                 self.output_size() == other.output_size()
-                and self._S == other._S
+                and np.array_equal(self._S, other._S)
             )
         elif isinstance(other, (int, Integer)) and other == 0:
             return max(self) > 0
         return self.tuple() == tuple(other)
 
+    @cached_method
     def __hash__(self):
         """
         Warning: does not match hash of the tuple, so will not match tuple in
         a set or dict
         """
-        return hash((self.output_size(), self.tuple()))
+        return hash((self.output_size(), self._S.tobytes()))
+
+    @cached_method
+    def digest(self):
+        """
+        Content hash (hex sha256) of the sizes and the table,
+        stable across processes and machines.
+        """
+        dtype = table_dtype(self.output_size()).newbyteorder("<")
+        h = hashlib.sha256(b"SBox2:%d:%d:" % (self.n, self.m))
+        h.update(np.asarray(self._S, dtype=dtype).tobytes())
+        return h.hexdigest()
+
+    def _stored(self, name, compute):
+        if self.STORE is None:
+            return compute()
+        return self.STORE.fetch(self.digest(), name, compute)
 
     def __iter__(self):
-        return iter(self.tuple())
+        # python ints, converted chunk by chunk
+        for i in range(0, len(self._S), ITER_CHUNK):
+            yield from self._S[i:i+ITER_CHUNK].tolist()
 
     def __getitem__(self, x):
-        x = int_tuple_list_vector(x)
-        return self._S[x]
+        if type(x) is not int:
+            x = int_tuple_list_vector(x)
+        return self._S.item(x)
     __call__ = __getitem__
 
+    def apply_many(self, xs):
+        """
+        Outputs for many inputs at once, as a numpy array.
+        @xs is an integer array, a buffer (bytes, array.array, ...)
+        or any iterable of integers.
+        """
+        if isinstance(xs, (bytes, bytearray)):
+            xs = np.frombuffer(xs, dtype=np.uint8)
+        elif hasattr(xs, "__len__"):
+            xs = np.asarray(xs)
+        else:
+            xs = np.fromiter(map(int, xs), dtype=np.int64)
+        if xs.dtype.kind not in "ui":
+            xs = xs.astype(np.int64)
+        return self._S[xs]
+    lookup_batch = apply_many
+
     def __repr__(self):
         return repr(self.tuple())
 
@@ -157,14 +285,19 @@ class SBox2:
         if not isinstance(other, type(self)) \
            or other.output_size() != self.input_size():
             other = type(self)(other, m=self.input_size())
-        return type(self)((self[y] for x, y in other.graph()), m=self.m)
+        # gather
+        return self._from_array(self._S[other._S], self.m)
+
+    def _identity(self):
+        n = self.input_size()
+        return self._from_array(np.arange(2**n, dtype=table_dtype(n)), n)
 
     def __pow__(self, e):
         if e < 0:
             return (~self)**(-e)
         if e == 0:
-            return self.new.identity(self.input_size)
-        res = self if e & 1 else self.new.identity(self.input_size)
+            return self._identity()
+        res = self if e & 1 else self._identity()
         a = self
         while e > 1:
             e >>= 1
@@ -177,6 +310,10 @@ class SBox2:
     # CYCLES
     # =================================================
     def cycles(self):
+        return [list(cycle) for cycle in self._cycles()]
+
+    @cached_method
+    def _cycles(self):
         assert self.is_permutation()
         xs = set(self.input_range())
         _cycles = []
@@ -190,12 +327,12 @@ class SBox2:
                     break
                 cycle.append(x)
                 xs.remove(x)
-            _cycles.append(cycle)
+            _cycles.append(tuple(cycle))
             cycle = []
-        return _cycles
+        return tuple(_cycles)
 
     def cycle_structure(self):
-        return sorted(map(len, self.cycles()))
+        return sorted(map(len, self._cycles()))
 
     def order(self):
         return lcm(self.cycle_structure())
@@ -203,77 +340,90 @@ class SBox2:
     # =================================================
     # INVERSION
     # =================================================
+    @cached_method
     def __invert__(self):
         assert self.is_permutation()
-        table = [None] * len(self)
-        for x, y in self.graph():
-            table[y] = x
-        assert None not in table
-        return type(self)(table)
+        # scatter
+        table = np.empty_like(self._S)
+        table[self._S] = np.arange(len(self), dtype=self._S.dtype)
+        return self._from_array(table, self.input_size())
 
     def preimage(self, x):
         x = int_tuple_list_vector(x)
-        return self._S.index(x)
+        xs = np.flatnonzero(self._S == x)
+        if not len(xs):
+            raise ValueError("%r is not in the image" % x)
+        return int(xs[0])
 
     def preimages(self, x):
         x = int_tuple_list_vector(x)
-        return tuple(xx for xx, y in self.graph() if y == x)
+        return self._preimage_map().get(x, ())
 
     def preimages_all(self):
-        res = defaultdict(list)
-        for x, y in self.graph():
-            res[y].append(x)
-        return res
+        return defaultdict(list, {
+            y: list(xs) for y, xs in self._preimage_map().items()
+        })
+
+    @cached_method
+    def _preimage_map(self):
+        xs = np.argsort(self._S, kind="stable")
+        ys, starts = np.unique(self._S[xs], return_index=True)
+        groups = np.split(xs, starts[1:])
+        return {
+            y: tuple(group.tolist())
+            for y, group in zip(ys.tolist(), groups)
+        }
 
     def preimage_structure(self):
-        return Counter(map(len, self.preimages_all().values()))
+        return Counter(map(len, self._preimage_map().values()))
 
     # =================================================
     # PROPERTIES
     # =================================================
     def is_involution(self):
-        # override
-        return all(self[y] == x for x, y in self.graph())
+        if self.input_size() != self.output_size():
+            return False
+        S = self._S
+        return bool((S[S] == np.arange(len(S))).all())
 
+    @cached_method
     def is_permutation(self):
         if self.input_size() != self.output_size():
             return False
-        ret = [None] * 2**self.output_size()
-        for x, y in self.graph():
-            ret[y] = 1
-        return None not in ret
+        seen = np.zeros(len(self), dtype=bool)
+        seen[self._S] = True
+        return bool(seen.all())
 
     def is_zero(self):
-        return max(self) == 0
+        return not self._S.any()
 
     def is_identity(self):
-        return all(x == y for x, y in self.graph())
+        return bool((self._S == np.arange(len(self))).all())
 
     def is_constant(self):
-        return min(self) == max(self)
+        return bool((self._S == self._S[0]).all())
 
     def is_linear(self):
         return self[0] == 0 and self.is_affine()
 
     def is_affine(self):
-        a = self[0]
-        res = [a]
+        """
+        S(x ^ 2^i) = S(x) ^ S(2^i) ^ S(0) for all x < 2^i, level by level
+        on array slices (stops at the first failing level).
+        """
+        S = self._S
         for i in range(self.input_size()):
-            delta = self[1 << i] ^ a
-            for y in res[::]:
-                res.append(y ^ delta)
-                if res[-1] != self[len(res)-1]:
-                    return False
+            h = 1 << i
+            if not np.array_equal(S[h:2*h], S[:h] ^ (S[h] ^ S[0])):
+                return False
         return True
 
     def is_balanced(self):
         expected = self.input_size() - self.output_size()
         if expected < 0:
             return False
-        return (
-            list(self.preimage_structure().items()) ==
-            [(2**expected, 2**self.output_size())]
-        )
+        counts = np.bincount(self._S, minlength=2**self.output_size())
+        return bool((counts == 2**expected).all())
 
     # =================================================
     # TRANSFORMATION
@@ -286,35 +436,32 @@ class SBox2:
         output = int_tuple_list_vector(output)
         assert input in self.input_range()
         assert output in self.output_range()
-        return type(self)(
-            [
-                self[x.__xor__(input)].__xor__(output)
-                for x in self.input_range()
-            ],
-            m=self.m
-        )
+        xs = np.arange(len(self)) ^ input
+        table = self._S[xs]
+        table ^= self._S.dtype.type(output)
+        return self._from_array(table, self.m)
 
     def __xor__(self, other):
         if isinstance(other, type(self)):
             assert self.input_size() == other.input_size()
             assert self.output_size() == other.output_size()
-            return type(self)(
-                [a.__xor__(b) for a, b in zip(self, other)],
-                m=self.m
-            )
+            return self._from_array(self._S ^ other._S, self.m)
         other = int_tuple_list_vector(other)
-        return type(self)([y ^ other for y in self], m=self.m)
+        assert other in self.output_range()
+        return self._from_array(
+            self._S ^ self._S.dtype.type(other), self.m
+        )
 
     def __and__(self, other):
-        if isinstance(other, int) or isinstance(other, Integer):
+        if isinstance(other, type(self)):
             assert self.input_size() == other.input_size()
             assert self.output_size() == other.output_size()
-            return type(self)(
-                [a.__and__(b) for a, b in zip(self, other)],
-                m=self.m
-            )
+            return self._from_array(self._S & other._S, self.m)
         other = int_tuple_list_vector(other)
-        return type(self)([y & other for y in self], m=self.m)
+        other &= (1 << self.output_size()) - 1
+        return self._from_array(
+            self._S & self._S.dtype.type(other), self.m
+        )
 
     def randomize_xor(self):
         a = randint(0, 2**self.input_size()-1)
@@ -322,35 +469,45 @@ class SBox2:
         return self.xor(a, b)
 
     def randomize_linear(self):
-        A = self.SBox2.new.random_linear_permutation(self.input_size())
-        B = self.SBox2.new.random_linear_permutation(self.output_size())
+        A = self.new.random_linear_permutation(self.input_size())
+        B = self.new.random_linear_permutation(self.output_size())
         return B * self * A
 
     def randomize_affine(self):
-        A = self.SBox2.new.random_affine_permutation(self.input_size())
-        B = self.SBox2.new.random_affine_permutation(self.output_size())
+        A = self.new.random_affine_permutation(self.input_size())
+        B = self.new.random_affine_permutation(self.output_size())
         return B * self * A
 
-    def transform_graph(self, func):
-        table = [None] * len(self)
-        for x, y in self.graph():
-            x2, y2 = func(x, y)
-            assert table[x2] is None
-            table[x2] = y2
-        return type(self)(table)
+    def transform_graph(self, func, m=None, vectorized=False):
+        """
+        New S-box with graph {func(x, y)}.
+        If @vectorized, @func is called once on the arrays of all x and y.
+        """
+        xs = np.arange(len(self))
+        if vectorized:
+            xs2, ys2 = func(xs, self._S)
+        else:
+            pairs = [func(x, y) for x, y in self.graph()]
+            xs2 = np.array([x2 for x2, y2 in pairs], dtype=np.int64)
+            ys2 = np.array([y2 for x2, y2 in pairs], dtype=np.int64)
+        assert (np.bincount(xs2, minlength=len(self)) == 1).all()
+        table = np.empty(len(self), dtype=np.asarray(ys2).dtype)
+        table[xs2] = ys2
+        return type(self)(table, m=m)
 
     def swap_halves(self, input=True, output=True):
-        if input:
-            fx = lambda x: Bin(x, self.input_size()).swap_halves().int
-        else:
-            fx = lambda x: x
-        if output:
-            fy = lambda y: Bin(y, self.output_size()).swap_halves().int
-        else:
-            fy = lambda y: y
-        return self.transform_graph(
-            lambda x, y: (fx(x), fy(y))
-        )
+        def swap(v, n):
+            assert n % 2 == 0
+            h = n // 2
+            return ((v & ((1 << h) - 1)) << h) | (v >> h)
+
+        def func(xs, ys):
+            if input:
+                xs = swap(xs, self.input_size())
+            if output:
+                ys = swap(ys, self.output_size())
+            return xs, ys
+        return self.transform_graph(func, vectorized=True)
 
     def squeeze_by_mask(self, mask):
         mask = int_tuple_list_vector(mask)
@@ -364,19 +521,60 @@ class SBox2:
     # =================================================
     # DEGREE STUFF
     # =================================================
+    @cached_method
+    def _mobius_array(self):
+        """
+        ANF table: bit (m-1-i) of entry u is set iff
+        the i-th coordinate contains the monomial x^u.
+        """
+        return self._stored("anf", lambda: mobius_inplace(
+            np.array(self._S, dtype=table_dtype(self.output_size()))
+        ))
+
     def mobius(self):
-        return type(self)(mobius(self.tuple()), m=self.m)
+        if self.output_size() == 1:
+            tt = mobius_packed(self.bitsliced()[0], self.input_size())
+            return self._boolean(tt)
+        # the cached transform is read-only, so it can be shared
+        return type(self)._from_array(self._mobius_array().view(), self.m)
+
+    @cached_method
+    def anfs_packed(self):
+        """
+        ANFs of coordinates (MSB to LSB) packed into integers:
+        bit u is the coefficient of the monomial x^u.
+        """
+        n = self.input_size()
+        return tuple(mobius_packed(tt, n) for tt in self.bitsliced())
+
+    def anf_masks(self):
+        """
+        Yield ANFs of coordinates (MSB to LSB) as increasing arrays of
+        monomial masks: bit (n-1-j) of a mask selects the variable x_j.
+        """
+        dtype = table_dtype(self.input_size())
+        for tt in self.anfs_packed():
+            yield np.flatnonzero(unslice(tt, len(self))).astype(dtype)
+
+    def write_anfs(self, filename, binary=False):
+        """
+        Stream ANF monomial masks of all coordinates to @filename,
+        see cry.sbox2.algorithms.anf for the text and binary formats.
+        """
+        with open(filename, "wb" if binary else "w") as f:
+            write_anf_masks(
+                f, self.anf_masks(),
+                self.input_size(), self.output_size(), binary=binary,
+            )
 
     def anfs(self):
         names = ["x%d" % e for e in range(self.input_size())]
         bpr = BooleanPolynomialRing(names=names)
         vs = list((bpr.gens()))
         res = []
-        for f in self.mobius().coordinates():
+        for masks in self.anf_masks():
             anf = bpr(0)
-            for mask, take in f.graph():
-                if not take:
-                    continue
+            for mask in masks.tolist():
                 clause = bpr(1)
                 for b, v in zip(Bin(mask, self.input_size()).tuple, vs):
                     if b:
@@ -393,8 +591,19 @@ class SBox2:
         for f in self.coordinates():
             yield f.to_sage_BF().algebraic_normal_form()
 
+    @cached_method
     def degrees(self):
-        return tuple(f.degree() for f in self.anfs())
+        """Degrees of coordinates (MSB to LSB), -1 for zero ones."""
+        return anf_degrees(
+            self._mobius_array(), self.input_size(), self.output_size()
+        )
+
+    @cached_method
+    def min_degree(self):
+        """Minimum degree over all nonzero components."""
+        return anf_min_degree(
+            self._mobius_array(), self.input_size(), self.output_size()
+        )
 
     def degree(self):
         return max(self.degrees())
@@ -402,54 +611,134 @@ class SBox2:
     # =================================================
     # TABLES
     # =================================================
-    def difference_distribution_table(self, zero_zero=True):
-        ddt = matrix(ZZ, 2**self.output_size(), 2**self.input_size())
-        for x in self.input_range():
-            for dx in self.input_range()[1:]:
-                dy = self[x] ^ self[x ^ dx]
-                ddt[dx, dy] += 1
+    def difference_distribution_table(self, zero_zero=True, as_array=False):
+        """
+        DDT[dx, dy] = #{x : S(x) ^ S(x ^ dx) = dy}
+        Computed with array operations; returned as a Sage matrix,
+        or as a compact numpy array if @as_array is set
+        (read-only if it is the cached table itself).
+        """
+        ddt = self._ddt_array()
         if zero_zero:
+            ddt = ddt.copy()
             ddt[0, 0] = 0
-        return ddt
+        if as_array:
+            return ddt
+        return matrix(ZZ, ddt.tolist())
     DDT = difference_distribution_table
 
-    def linear_approximation_table(self, zero_zero=True):
-        lat = matrix(ZZ, 2**self.input_size(), 2**self.output_size(), [
-            self.component(mask).to_sage_BF().walsh_hadamard_transform()
-            for mask in self.output_range()
-        ]).transpose()
+    @cached_method
+    def _ddt_array(self):
+        return self._stored(
+            "ddt", lambda: ddt_table(self._S, self.output_size())
+        )
+
+    def linear_approximation_table(self, zero_zero=True, abs=True,
+                                   as_array=False):
+        """
+        LAT[a, b] = sum_x (-1)^(a.x + b.S(x)) (absolute values by default)
+        Computed by one fast Walsh transform of the graph for all components;
+        returned as a Sage matrix, or as a numpy array if @as_array is set
+        (read-only if it is the cached table itself).
+        """
+        lat = self._lat_array()
+        if zero_zero or abs:
+            lat = lat.copy()
         if zero_zero:
             lat[0, 0] = 0
         if abs:
-            lat = lat.apply_map(abs)
-        return lat
+            np.abs(lat, out=lat)
+        if as_array:
+            return lat
+        return matrix(ZZ, lat.tolist())
     LAT = linear_approximation_table
 
-    def DDT_distrib(self, *a, **k):
-        return mat_distribution(self.DDT(*a, **k))
+    @cached_method
+    def _lat_array(self):
+        return self._stored(
+            "lat", lambda: lat_table(self._S, self.output_size())
+        )
 
-    def LAT_distrib(self, *a, **k):
-        return mat_distribution(self.LAT(*a, **k))
+    def DDT_distrib(self, zero_zero=True):
+        res = Counter(dict(self._ddt_distrib()))
+        if zero_zero:
+            res[len(self)] -= 1
+            res[0] += 1
+            res += Counter()
+        return res
+
+    @cached_method
+    def _ddt_distrib(self):
+        if is_cached(self, "_ddt_array"):
+            distrib = table_distrib(self._ddt_array())
+        else:
+            distrib = ddt_distrib(self._S, self.output_size())
+        return tuple(sorted(distrib.items()))
+
+    @cached_method
+    def differential_uniformity(self, bound=None, processes=1):
+        """
+        max DDT[dx, dy] over dx != 0.
+        With @bound, stops at the first rows exceeding it (low-weight dx
+        first): the result is exact if <= @bound, otherwise it only
+        certifies that the bound is exceeded. @processes workers share
+        the rows (None = all).
+        """
+        if is_cached(self, "_ddt_array"):
+            return int(self._ddt_array()[1:].max())
+        return differential_uniformity(
+            self._S, self.output_size(), bound=bound, processes=processes
+        )
+
+    @cached_method
+    def linearity(self, bound=None, processes=1):
+        """
+        max |LAT[a, b]| over b != 0, transforming one block of components
+        at a time instead of building the LAT.
+        With @bound, stops at the first component exceeding it: the result
+        is exact if <= @bound, otherwise it only certifies that the bound
+        is exceeded. @processes workers share the components (None = all).
+        """
+        if is_cached(self, "_lat_array"):
+            return int(np.abs(self._lat_array()[:, 1:]).max(initial=0))
+        return linearity(
+            self._S, self.output_size(), bound=bound, processes=processes
+        )
+
+    def LAT_distrib(self, zero_zero=True, abs=True):
+        return table_distrib(self.LAT(zero_zero, abs, as_array=True))
+
+    @cached_method
+    def bitsliced(self):
+        """
+        Coordinates packed into integers (most significant first):
+        bit x of the i-th one is the bit i of S(x).
+        """
+        return tuple(bitslice(self._S, self.output_size()))
 
     def coordinate(self, i):
         assert 0 <= i < self.output_size()
-        tt = [
-            (y >> (self.output_size() - 1 - i)) & 1
-            for y in self
-        ]
-        return type(self)(tt, m=1)
+        return self._boolean(self.bitsliced()[i])
 
     def coordinates(self):
         for i in range(self.output_size()):
             yield self.coordinate(i)
 
-    def component(self, mask):
+    def component_packed(self, mask):
+        """Component <mask, S(x)> packed into an integer, see bitsliced."""
         mask = int_tuple_list_vector(mask)
-        tt = [
-            Bin(y & mask).parity
-            for y in self
-        ]
-        return type(self)(tt, m=1)
+        assert 0 <= mask < 2**self.output_size()
+        tt = 0
+        for i, coord in enumerate(reversed(self.bitsliced())):
+            if mask >> i & 1:
+                tt ^= coord
+        return tt
+
+    def component(self, mask):
+        return self._boolean(self.component_packed(mask))
+
+    def _boolean(self, tt):
+        return type(self)._from_array(unslice(tt, len(self)), 1)
 
     # TBD
     # def components(self, with_masks=False, with_anfs=False):
@@ -484,7 +773,38 @@ class SBox2:
     def weight(self):
         if self.output_size() != 1:
             raise TypeError("Weight is defined only for Boolean Functions")
-        return sum(self)
+        return int_weight(self.bitsliced()[0])
+
+
+Equiv.cls = Equiv.new = SBox2
+
+ITER_CHUNK = 4096
+
+
+def as_table_array(spec, m=None):
+    """
+    Integer numpy array from a lookup table specification, without
+    an intermediate list: other iterables are read with np.fromiter,
+    into table_dtype(@m) if @m is given. Arrays of SBox2 and numpy
+    arrays are returned as they are.
+    """
+    if isinstance(spec, SBox2):
+        return spec._S
+    if isinstance(spec, np.ndarray):
+        return spec
+    if isinstance(spec, bytes):
+        return np.frombuffer(spec, dtype=np.uint8)
+    if isinstance(spec, bytearray):
+        # mutable buffer: do not share it
+        return np.frombuffer(spec, dtype=np.uint8).copy()
+    dtype = np.int64 if m is None else table_dtype(int(m))
+    count = len(spec) if hasattr(spec, "__len__") else -1
+    return np.fromiter((int(y) for y in spec), dtype=dtype, count=count)
+
+
+def table_dtype(m):
+    """Smallest unsigned numpy dtype holding @m-bit values."""
+    return np.min_scalar_type((1 << max(m, 1)) - 1)
 
 
 def int_tuple_list_vector(v):
@@ -1,17 +1,16 @@
-import os.path as Path
-import subprocess
-from functools import reduce
-
-import ast
 from collections import Counter
 
+import numpy as np
+
 from binteger import Bin
 
-from cry.sagestuff import ZZ, GF, Integer, matrix, randint, Combinations
+from cry.sagestuff import ZZ, GF, Integer, matrix, randint
 
-from cry.py.anf import mobius
+from cry.py.anf.mobius import walsh_inplace
 
-DDT_EXE = Path.join(Path.abspath(Path.dirname(__file__)), "ddt")
+from .algorithms.ddt import ddt_distrib_parallel
+from .algorithms.difftable import difference_table, kddt
+from .algorithms.field import gf2n_of
 
 
 class Tables(object):
@@ -25,92 +24,59 @@ class Tables(object):
                 res = min(res, Integer(dy).popcount() + Integer(dx).popcount)
         return res
 
+    def difference_table(self, din="xor", dout="xor", F=None,
+                         as_array=False):
+        """
+        T[dx, dy] = #{x : S(x * dx) / S(x) = dy} for input/output
+        difference operators "xor", "add" (modular) or "cmul" (in the field
+        @F, GF(2^n) by default); see cry.sbox2.algorithms.difftable.
+        """
+        log = exp = None
+        if "cmul" in (din, dout):
+            if F is None:
+                F = GF(len(self), name='a')
+            field = gf2n_of(F)
+            log, exp = field.log, field.exp
+        res = difference_table(
+            self._S, self.n, self.m, din, dout, log=log, exp=exp
+        )
+        if as_array:
+            return res
+        return matrix(ZZ, res.tolist())
+
     def kddt(self, k=3, zero_zero=False):
-        kddt = matrix(ZZ, self.insize, self.outsize)
-        for xs in Combinations(range(self.insize), k):
-            ys = map(self, xs)
-            dx = reduce(lambda a, b: a ^ b, xs)
-            dy = reduce(lambda a, b: a ^ b, ys)
-            kddt[dx, dy] += 1
+        res = kddt(self._S, self.n, self.m, k=k)
         if zero_zero:
-            kddt[0, 0] = 0
-        return kddt
+            res[0, 0] = 0
+        return matrix(ZZ, res.tolist())
 
     def add_add_ddt(self):
-        addt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(self.insize):
-            for dx in range(1, self.insize):
-                x2 = (x + dx) % self.insize
-                y = self[x]
-                y2 = self[x2]
-                dy = (y2 - y) % self.outsize
-                addt[dx, dy] += 1
-        return addt
+        return self.difference_table("add", "add")
 
     def add_xor_ddt(self):
-        axddt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(self.insize):
-            for dx in range(1, self.insize):
-                x2 = (x + dx) % self.insize
-                y = self[x]
-                y2 = self[x2]
-                dy = y ^ y2
-                axddt[dx, dy] += 1
-        return axddt
+        return self.difference_table("add", "xor")
 
     def xor_add_ddt(self):
-        axddt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(self.insize):
-            for dx in range(1, self.insize):
-                x2 = x ^ dx
-                y = self[x]
-                y2 = self[x2]
-                dy = (y2 - y) % self.outsize
-                axddt[dx, dy] += 1
-        return axddt
+        return self.difference_table("xor", "add")
 
     def cmul_xor_ddt(self, F=None):
-        if F is None:
-            F = GF(self.insize, name='a')
-        cxddt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(1, self.insize):
-            for dx in range(2, self.insize):
-                x2 = (F.fetch_int(x) * F.fetch_int(dx)).integer_representation()
-                y = self[x]
-                y2 = self[x2]
-                dy = y2 ^ y
-                cxddt[dx, dy] += 1
-        return cxddt
+        return self.difference_table("cmul", "xor", F=F)
 
     def cmul_cmul_ddt(self, F=None):
-        if F is None:
-            F = GF(self.insize, name='a')
-        ccddt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(1, self.insize):
-            for dx in range(2, self.insize):
-                x2 = (F.fetch_int(x) * F.fetch_int(dx)).integer_representation()
-                y = self[x]
-                y2 = self[x2]
-                dy = (
-                    F.fetch_int(y2) * F.fetch_int(y)**(self.outsize - 2)
-                ).integer_representation()
-                ccddt[dx, dy] += 1
-        return ccddt
+        return self.difference_table("cmul", "cmul", F=F)
 
     def xor_cmul_ddt(self, F=None):
-        if F is None:
-            F = GF(self.insize, name='a')
-        xcddt = matrix(ZZ, self.insize, self.outsize)
-        for x in range(self.insize):
-            for dx in range(1, self.insize):
-                x2 = x ^ dx
-                y = self[x]
-                y2 = self[x2]
-                dy = (
-                    F.fetch_int(y2) * F.fetch_int(y)**(self.outsize - 2)
-                ).integer_representation()
-                xcddt[dx, dy] += 1
-        return xcddt
+        return self.difference_table("xor", "cmul", F=F)
+
+    def linear_structures(self):
+        """
+        Pairs (a, b), a, b != 0, such that b.(S(x) ^ S(x ^ a)) is constant,
+        i.e. the Walsh transform of the DDT row a is +-2^n at b.
+        """
+        res = self.DDT(zero_zero=False, as_array=True).astype(np.int64)
+        walsh_inplace(res, axis=1)
+        a, b = np.nonzero(np.abs(res[1:, 1:]) == len(self))
+        return list(zip((a + 1).tolist(), (b + 1).tolist()))
 
     def minilat(self, abs=False):
         """LAT taken on a basis points"""
@@ -138,30 +104,31 @@ class Tables(object):
         """
         hdim[i,j] = i-th output bit contains monomial x1...xn/xj
         """
-        res = matrix(GF(2), self.in_bits, self.out_bits)
-        anf = mobius(tuple(self))
-        for j in range(self.in_bits):
-            mask = (1 << self.in_bits) - 1
-            mask ^= 1 << (self.in_bits - 1 - j)
-            res.set_column(j, Bin(anf[mask], self.out_bits).tuple)
+        res = matrix(GF(2), self.m, self.n)
+        anf = self._mobius_array()
+        for j in range(self.n):
+            mask = (1 << self.n) - 1
+            mask ^= 1 << (self.n - 1 - j)
+            res.set_column(j, Bin(int(anf[mask]), self.m).tuple)
         if right_to_left:
             res = res[::-1,::-1]
         return res
 
-    def ddt_distrib_fast(self):
-        inp = "%d\n" % self.insize
-        inp += " ".join(map(str, self))
-        p = subprocess.Popen(DDT_EXE, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-        s = p.communicate(inp)[0]
-        return Counter(ast.literal_eval(s))
+    def ddt_distrib_fast(self, processes=None):
+        """
+        DDT_distrib() computed on a process pool (all cores by default)
+        """
+        return ddt_distrib_parallel(
+            self._S, self.m, zero_zero=True, processes=processes
+        )
 
     def ddt_max_estimation(self, iter=100, limit=None):
         mx = 0
         for i in range(iter):
-            dx = randint(1, self.insize - 1)
+            dx = randint(1, len(self) - 1)
             cnt = 0
             dys = Counter()
-            for x in range(self.insize):
+            for x in range(len(self)):
                 dy = self[x] ^ self[x^dx]
                 dys[dy] += 1
                 if limit is not None and dys[dy] > limit:
@@ -169,58 +136,54 @@ class Tables(object):
                 mx = max(mx, dys[dy])
         return mx
 
-    def max_ddt(self):
-        return max(self.ddt_distrib_fast().keys())
-        #return max(self.ddt(zero_zero=True).list())
+    def max_ddt(self, processes=1):
+        # the DDT with zero_zero has only zeros in row 0
+        return self.differential_uniformity(processes=processes)
 
     def max_lat(self):
-        return max(self.lat(zero_zero=True, abs=True).list())
+        return self.linearity()
 
     def nonlinearity(self):
-        #return min(c.nonlinearity() for c in self.components())
-        return 2**(self.m - 1) - self.max_lat()
+        # LAT holds Walsh coefficients: NL = 2^(n-1) - max|W| / 2
+        return 2**(self.n - 1) - self.linearity() // 2
 
-    def is_APN(self):
+    def is_APN(self, processes=1):
         """
         self.max_ddt() == 2
         """
-        if self.ddt_max_estimation(limit=2) > 2:
-            return False
-        return max(self.ddt_distrib_fast().keys()) <= 2
+        return self.differential_uniformity(bound=2, processes=processes) <= 2
 
     def is_almost_bent(self):
         """
         Achieving bound: (Sidelnikov-Chabaud-Vaudenay bound)
-            self.nonlinearity() <= 2**(self.m-1) - 2**((self.m-1)/2
-            <=>
-            self.max_lat() >= 2**((self.m-1)/2) = sqrt(2**m) / sqrt(2)
+            self.linearity() >= 2**((self.n+1)/2)
 
-        Defined only if self.n == self.m ???
+        Defined only if self.n == self.m
         Only possible if:
-            self.m is odd
+            self.n is odd
         Also, almost_bent => APN
         """
         assert self.n == self.m
-        if self.m & 1 == 0:
+        if self.n & 1 == 0:
             return False
-        max_lat = self.max_lat()
-        assert max_lat >= 2**((self.m - 1)/2), "Bound fail"
-        return max_lat == 2**((self.m - 1)/2)
+        bound = 2**((self.n + 1) // 2)
+        lin = self.linearity(bound=bound)
+        assert lin >= bound, "Bound fail"
+        return lin == bound
 
     def is_bent(self):
         """
         Achieving bound: (covering radius bound)
-            self.nonlinearity() <= 2**(self.m-1) - 2**(self.m/2 - 1)
-            <=>
-            self.max_lat() >= 2**(self.m/2 - 1) = sqrt(2**m) / 2
+            self.linearity() >= 2**(self.n/2)
 
         Only possible if:
-            self.m is even
+            self.n is even
             and
-            self.m >= self.n * 2
+            self.n >= self.m * 2
         """
-        max_lat = self.max_lat()
-        if self.m & 1:
+        if self.n & 1 or self.m == 0:
             return False
-        assert max_lat >= 2**(self.m / 2 - 1), "Bound fail"
-        return max_lat == 2**(self.m / 2 - 1)
+        bound = 2**(self.n // 2)
+        lin = self.linearity(bound=bound)
+        assert lin >= bound, "Bound fail"
+        return lin == bound
@@ -2,6 +2,8 @@ import time, os, logging
 import ast
 from functools import wraps
 
+import numpy as np
+
 import hashlib
 H = lambda s: hashlib.sha256(s).hexdigest()
 
@@ -140,3 +142,48 @@ def permanent_func_hash(fn):
         if not callable(v):
             res.append(str(fn.func_globals.get(g, None)))
     return H(str(res))
+
+
+class TableStore(object):
+    """
+    Content-addressed on-disk store of numpy tables.
+    Table @name of object @key (hex digest) lives in
+        path/<key[:2]>/<key>/<name>.npy
+    and is loaded memory-mapped (read-only), so reloading is almost free.
+    """
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def filename(self, key, name):
+        return os.path.join(self.path, key[:2], key, name + ".npy")
+
+    def __contains__(self, key_name):
+        return os.path.exists(self.filename(*key_name))
+
+    def load(self, key, name):
+        try:
+            return np.load(self.filename(key, name), mmap_mode="r")
+        except (IOError, ValueError):
+            return None
+
+    def save(self, key, name, table):
+        filename = self.filename(key, name)
+        dirname = os.path.dirname(filename)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        # write & rename, so that readers never see partial files
+        tmp = "%s.%d.tmp" % (filename, os.getpid())
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(table))
+        os.replace(tmp, filename)
+
+    def fetch(self, key, name, compute):
+        table = self.load(key, name)
+        if table is None:
+            t0 = time.time()
+            self.save(key, name, compute())
+            msg("[i] stored %s/%s in %.2fs" % (key, name, time.time() - t0))
+            table = self.load(key, name)
+        return table